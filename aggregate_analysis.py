@@ -1,122 +1,172 @@
 #!/usr/bin/env python3
 """
 Aggregate individual story analysis reports into a combined analysis.json file.
+
+Each report's story entry and stat contributions are kept in a manifest
+(.cache/aggregate.sqlite) keyed by the report's mtime, size and content
+hash, so a re-run only re-parses new or changed reports and applies the
+differences to aggregate_stats. Use --full to rebuild from scratch.
 """
 
+import argparse
+import hashlib
 import json
+import os
 import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+from behaviors_table import TABLE_DIR, BehaviorsTableWriter, table_is_current
+from generate_csv import (
+    CSV_DIR, CSV_OUTPUTS, DEFAULT_GROUP_DIMENSIONS, GROUP_DIMENSIONS, encode_story, generate_csv_files,
+    write_if_changed,
+)
+from metadata_store import METADATA_FILE, MetadataStore, file_fingerprint, get_batch_from_directory
+
 SCRIPT_DIR = Path(__file__).parent
 REPORTS_DIR = SCRIPT_DIR / "reports"
-METADATA_FILE = SCRIPT_DIR / "metadata.json"
 OUTPUT_FILE = SCRIPT_DIR / "analysis.json"
-
-# Directory to batch mapping
-BATCH_MAPPING = {
-    "0 Claude 500": 0,
-    "1 Claude 500 1of4": 1,
-    "1 Claude 500 2of4": 1,
-    "1 Claude 500 3of4": 1,
-    "1 Claude 259 4of4": 1,
-    "2 Claude 500 1of6": 2,
-    "2 Claude 500 2of6": 2,
-    "2 Claude 500 3of6": 2,
-    "2 Claude 500 4of6": 2,
-    "2 Claude 500 5of6": 2,
-    "2 Claude 468 6of6": 2,
-}
-
-
-def get_batch_from_directory(dir_name: str) -> int:
-    """Get batch number from directory name."""
-    return BATCH_MAPPING.get(dir_name, -1)
-
-
-def extract_json_from_file(filepath: Path) -> dict | None:
-    """Extract JSON from a file, handling preamble text and markdown code blocks."""
+SHARDS_DIR = SCRIPT_DIR / "analysis"
+MANIFEST_FILE = SCRIPT_DIR / ".cache" / "aggregate.sqlite"
+
+# Bump when story entries or stat contributions are built or stored
+# differently, so manifests written by older versions are rebuilt
+MANIFEST_VERSION = 4
+
+# Indentation of each story entry inside analysis.json's "stories" list
+STORY_INDENT = "    "
+
+# Most stories per detail shard; shards never mix genres
+SHARD_SIZE = 100
+
+# Behavior categories for the per-story counts in the viewer index,
+# as "benevolence_alignment_portrayal"
+BENEVOLENCE_LEVELS = ["benevolent", "ambiguous", "malevolent"]
+ALIGNMENT_LEVELS = ["aligned", "ambiguous", "misaligned"]
+PORTRAYAL_LEVELS = ["positive", "neutral", "negative"]
+CATEGORY_KEYS = [
+    f"{benevolence}_{alignment}_{portrayal}"
+    for benevolence in BENEVOLENCE_LEVELS
+    for alignment in ALIGNMENT_LEVELS
+    for portrayal in PORTRAYAL_LEVELS
+]
+CATEGORY_INDEX = {key: i for i, key in enumerate(CATEGORY_KEYS)}
+
+
+def extract_json(content: str) -> dict | None:
+    """Extract JSON from report text, handling preamble text and markdown code blocks."""
+    # Try parsing as-is first
     try:
-        content = filepath.read_text(encoding="utf-8")
+        return json.loads(content)
+    except json.JSONDecodeError:
+        pass
 
-        # Try parsing as-is first
+    # Try to find JSON in markdown code block (```json ... ``` or ``` ... ```)
+    code_block_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', content, re.DOTALL)
+    if code_block_match:
         try:
-            return json.loads(content)
+            return json.loads(code_block_match.group(1))
         except json.JSONDecodeError:
             pass
 
-        # Try to find JSON in markdown code block (```json ... ``` or ``` ... ```)
-        code_block_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', content, re.DOTALL)
-        if code_block_match:
-            try:
-                return json.loads(code_block_match.group(1))
-            except json.JSONDecodeError:
-                pass
-
-        # Try to find raw JSON object in content (greedy, finds largest match)
-        match = re.search(r'\{.*\}', content, re.DOTALL)
-        if match:
-            try:
-                return json.loads(match.group())
-            except json.JSONDecodeError:
-                pass
-
-        return None
-    except Exception as e:
-        print(f"  Error reading {filepath}: {e}")
-        return None
+    # Try to find raw JSON object in content (greedy, finds largest match)
+    match = re.search(r'\{.*\}', content, re.DOTALL)
+    if match:
+        try:
+            return json.loads(match.group())
+        except json.JSONDecodeError:
+            pass
 
+    return None
 
-def load_metadata() -> dict:
-    """Load story metadata and index by file path."""
-    if not METADATA_FILE.exists():
-        return {}
 
-    with open(METADATA_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
+REPORT_PATTERNS = [
+    ("misalignment_v1", "-prompt1-misalignment.md"),
+    ("misalignment_v2", "-prompt1-misalignment-v2.md"),
+    ("categorization_v1", "-prompt2-categorization.md"),
+    ("categorization_v2", "-prompt2-categorization-v2.md"),
+    ("benevolent_v1", "-prompt3-benevolent.md"),
+    ("benevolent_v2", "-prompt3-benevolent-v2.md"),
+    ("harmful_v1", "-prompt4-harmful.md"),
+    ("harmful_v2", "-prompt4-harmful-v2.md"),
+]
 
-    # Index by file path
-    return {item["file"]: item for item in data}
 
+def index_markdown_reports(entries) -> dict[str, dict[str, os.DirEntry]]:
+    """Index one directory listing's markdown reports by story stem: stem -> {report_key: entry}."""
+    index = {}
+    for entry in entries:
+        name = entry.name
+        if not name.endswith(".md") or "-prompt" not in name:
+            continue
+        for report_key, suffix in REPORT_PATTERNS:
+            if name.endswith(suffix):
+                index.setdefault(name[:-len(suffix)], {})[report_key] = entry
+                break
+    return index
+
+
+def scan_reports(reports_dir: Path) -> list[tuple[Path, os.DirEntry, dict[str, os.DirEntry]]]:
+    """
+    Find every *-behaviors.json under reports_dir, with its markdown reports,
+    using one os.scandir listing per directory instead of probing each
+    candidate filename. Returns (behavior_file, entry, markdown_reports)
+    tuples sorted by path, where markdown_reports maps report_key to entry.
+    """
+    found = []
+    pending = [reports_dir]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except FileNotFoundError:
+            continue
+        markdown_index = index_markdown_reports(entries)
+        for entry in entries:
+            if entry.is_dir():
+                pending.append(Path(entry.path))
+            elif entry.name.endswith("-behaviors.json"):
+                behavior_file = Path(entry.path)
+                story_stem = behavior_file.stem.replace("-behaviors", "")
+                found.append((behavior_file.parts, behavior_file, entry, markdown_index.get(story_stem, {})))
+    # Sorting on parts gives the same order as sorting the paths, without Path comparisons
+    found.sort(key=lambda item: item[0])
+    return [item[1:] for item in found]
+
+
+def find_markdown_reports(story_dir: Path, story_stem: str, filenames: dict[str, str] | None = None) -> dict:
+    """
+    Find all markdown reports for a story. filenames maps report_key to
+    filename, as indexed by scan_reports(); if omitted, story_dir is listed.
+    """
+    if filenames is None:
+        with os.scandir(story_dir) as it:
+            filenames = {key: entry.name for key, entry in index_markdown_reports(it).get(story_stem, {}).items()}
 
-def find_markdown_reports(story_dir: Path, story_stem: str) -> dict:
-    """Find all markdown reports for a story."""
     reports = {}
-
-    # Look for various report types
-    report_patterns = [
-        ("misalignment_v1", f"{story_stem}-prompt1-misalignment.md"),
-        ("misalignment_v2", f"{story_stem}-prompt1-misalignment-v2.md"),
-        ("categorization_v1", f"{story_stem}-prompt2-categorization.md"),
-        ("categorization_v2", f"{story_stem}-prompt2-categorization-v2.md"),
-        ("benevolent_v1", f"{story_stem}-prompt3-benevolent.md"),
-        ("benevolent_v2", f"{story_stem}-prompt3-benevolent-v2.md"),
-        ("harmful_v1", f"{story_stem}-prompt4-harmful.md"),
-        ("harmful_v2", f"{story_stem}-prompt4-harmful-v2.md"),
-    ]
-
-    for report_key, filename in report_patterns:
-        filepath = story_dir / filename
-        if filepath.exists():
-            reports[report_key] = filepath.read_text(encoding="utf-8")
+    for report_key, _ in REPORT_PATTERNS:
+        if report_key in filenames:
+            reports[report_key] = (story_dir / filenames[report_key]).read_text(encoding="utf-8")
 
     return reports
 
 
-def aggregate_reports():
-    """Aggregate all reports into a single analysis file."""
-    print("Aggregating analysis reports...")
+def markdown_report_signature(markdown_reports: dict[str, os.DirEntry]) -> list:
+    """(suffix, mtime_ns, size) of each markdown report present, for change detection."""
+    signature = []
+    for report_key, suffix in REPORT_PATTERNS:
+        if report_key in markdown_reports:
+            stat = markdown_reports[report_key].stat()
+            signature.append([suffix, stat.st_mtime_ns, stat.st_size])
+    return signature
 
-    # Load metadata
-    metadata_index = load_metadata()
-    print(f"  Loaded metadata for {len(metadata_index)} stories")
 
-    # Find all behavior JSON files
-    behavior_files = list(REPORTS_DIR.rglob("*-behaviors.json"))
-    print(f"  Found {len(behavior_files)} behavior reports")
-
-    stories = []
-    aggregate_stats = {
+def new_aggregate_stats() -> dict:
+    """Zeroed aggregate_stats."""
+    return {
         "by_category": {
             "benevolent_aligned": 0,
             "benevolent_ambiguous": 0,
@@ -142,92 +192,621 @@ def aggregate_reports():
         },
     }
 
-    for behavior_file in sorted(behavior_files):
-        print(f"  Processing {behavior_file.name}...")
 
-        # Extract JSON
-        data = extract_json_from_file(behavior_file)
-        if not data:
-            print(f"    Skipping - could not parse JSON")
-            continue
+def story_stats(data: dict) -> dict:
+    """One report's contribution to aggregate_stats."""
+    stats = new_aggregate_stats()
+
+    summary = data.get("summary", {})
+    for key in stats["by_category"]:
+        stats["by_category"][key] += summary.get(key, 0)
+
+    # Count portrayals from behaviors
+    for behavior in data.get("behaviors", []):
+        portrayal = behavior.get("portrayal", "").lower()
+        if portrayal in stats["by_portrayal"]:
+            stats["by_portrayal"][portrayal] += 1
+
+    # Backfire risk
+    stats["backfire_risk"] += summary.get("positive_portrayal_of_misaligned", 0)
+
+    # Assessment
+    assessment = data.get("project_assessment", {}).get("success_level", "").lower()
+    if assessment in stats["by_assessment"]:
+        stats["by_assessment"][assessment] += 1
+
+    return stats
+
+
+def add_stats(total: dict, contribution: dict, sign: int = 1):
+    """Add (or with sign=-1, remove) one story's contribution to aggregate_stats in place."""
+    for key, value in contribution.items():
+        if isinstance(value, dict):
+            add_stats(total[key], value, sign)
+        else:
+            total[key] += sign * value
+
+
+def build_story_entry(behavior_file: Path, data: dict, metadata_index: dict,
+                      markdown_files: dict[str, str] | None = None) -> dict:
+    """Build the analysis.json entry for one parsed behaviors report."""
+    # Determine story file path
+    # reports/0 Claude 500/story-behaviors.json -> 0 Claude 500/story.md
+    rel_dir = behavior_file.parent.name
+    story_stem = behavior_file.stem.replace("-behaviors", "")
+    story_file = f"{rel_dir}/{story_stem}.md"
+    batch = get_batch_from_directory(rel_dir)
+
+    # Get genre from behavior analysis (preferred) or fall back to metadata
+    genre = data.get("genre")
+    if not genre:
+        story_metadata = metadata_index.get(story_file, {})
+        genre = story_metadata.get("genre", "Unknown")
+
+    # Find markdown reports
+    md_reports = find_markdown_reports(behavior_file.parent, story_stem, markdown_files)
+
+    return {
+        "file": story_file,
+        "batch": batch,
+        "story_title": data.get("story_title", story_stem),
+        "genre": genre,
+        "genre_description": data.get("genre_description", ""),
+        "ai_characters": data.get("ai_characters", []),
+        "behaviors": data.get("behaviors", []),
+        "summary": data.get("summary", {}),
+        "project_assessment": data.get("project_assessment", {}),
+        "reports": md_reports,
+    }
 
-        # Determine story file path
-        # reports/0 Claude 500/story-behaviors.json -> 0 Claude 500/story.md
-        rel_dir = behavior_file.parent.name
-        story_stem = behavior_file.stem.replace("-behaviors", "")
-        story_file = f"{rel_dir}/{story_stem}.md"
-        batch = get_batch_from_directory(rel_dir)
-
-        # Get genre from behavior analysis (preferred) or fall back to metadata
-        genre = data.get("genre")
-        if not genre:
-            story_metadata = metadata_index.get(story_file, {})
-            genre = story_metadata.get("genre", "Unknown")
-
-        # Find markdown reports
-        md_reports = find_markdown_reports(behavior_file.parent, story_stem)
-
-        # Build story entry
-        story_entry = {
-            "file": story_file,
-            "batch": batch,
-            "story_title": data.get("story_title", story_stem),
-            "genre": genre,
-            "genre_description": data.get("genre_description", ""),
-            "ai_characters": data.get("ai_characters", []),
-            "behaviors": data.get("behaviors", []),
-            "summary": data.get("summary", {}),
-            "project_assessment": data.get("project_assessment", {}),
-            "reports": md_reports,
+
+def story_summary(story_entry: dict) -> dict:
+    """
+    The viewer's index entry for a story: enough to draw the grid, the
+    filters and the story list without loading its details. counts holds
+    the number of behaviors in each CATEGORY_KEYS category.
+    """
+    counts = [0] * len(CATEGORY_KEYS)
+    for behavior in story_entry["behaviors"]:
+        key = "_".join(str(behavior.get(field) or "").lower() for field in ("benevolence", "alignment", "portrayal"))
+        if key in CATEGORY_INDEX:
+            counts[CATEGORY_INDEX[key]] += 1
+
+    assessment = story_entry["project_assessment"]
+    success_level = assessment.get("success_level") if isinstance(assessment, dict) else None
+    return {
+        "file": story_entry["file"],
+        "title": story_entry["story_title"],
+        "genre": story_entry["genre"],
+        "batch": story_entry["batch"],
+        "assessment": str(success_level or "").lower(),
+        "behaviors": len(story_entry["behaviors"]),
+        "counts": counts,
+    }
+
+
+class ReportManifest:
+    """
+    SQLite record of every aggregated report: its mtime, size and content
+    hash, the signature of its markdown companions, and the story entry,
+    stat contributions, viewer summary and generate_csv record built from it
+    (all NULL if it could not be parsed). Entries are stored serialised with json.dumps(indent=2),
+    as they appear in analysis.json, so unchanged stories are copied into
+    the output without re-encoding.
+    The running aggregate_stats total is stored alongside, so a re-run can
+    subtract and add the contributions of just the reports that changed.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        if self.get_meta("version") != MANIFEST_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS reports")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS reports (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                companions TEXT NOT NULL,
+                uses_metadata INTEGER NOT NULL,
+                entry TEXT,
+                stats TEXT,
+                summary TEXT,
+                record TEXT
+            )
+        """)
+        if self.get_meta("version") != MANIFEST_VERSION:
+            self.clear()
+
+    def get_meta(self, key: str):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_meta(self, key: str, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def clear(self):
+        self._conn.execute("DELETE FROM reports")
+        self._conn.execute("DELETE FROM meta")
+        self.set_meta("version", MANIFEST_VERSION)
+        self._conn.commit()
+
+    def index(self) -> dict[str, tuple]:
+        """path -> (mtime_ns, size, hash, companions, uses_metadata, stats)"""
+        rows = self._conn.execute(
+            "SELECT path, mtime_ns, size, hash, companions, uses_metadata, stats FROM reports"
+        )
+        return {row[0]: row[1:] for row in rows}
+
+    def put(self, path: str, mtime_ns: int, size: int, content_hash: str, companions: str,
+            uses_metadata: bool, entry_text: str | None, stats: dict | None, summary: dict | None,
+            record: dict | None):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO reports "
+            "(path, mtime_ns, size, hash, companions, uses_metadata, entry, stats, summary, record) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, mtime_ns, size, content_hash, companions, uses_metadata, entry_text,
+             None if stats is None else json.dumps(stats),
+             None if summary is None else json.dumps(summary, ensure_ascii=False),
+             None if record is None else json.dumps(record, ensure_ascii=False))
+        )
+
+    def touch(self, path: str, mtime_ns: int, size: int):
+        """Record a new mtime for a report whose content is unchanged."""
+        self._conn.execute("UPDATE reports SET mtime_ns = ?, size = ? WHERE path = ?", (mtime_ns, size, path))
+
+    def delete(self, path: str):
+        self._conn.execute("DELETE FROM reports WHERE path = ?", (path,))
+
+    def entry_count(self) -> int:
+        """Number of reports that parsed into a story entry."""
+        return self._conn.execute("SELECT COUNT(*) FROM reports WHERE entry IS NOT NULL").fetchone()[0]
+
+    def entries(self, paths):
+        """
+        Yield (entry_text, summary, record) for each path in turn, skipping
+        reports that did not parse. summary and record are returned as their
+        JSON text.
+        """
+        for path in paths:
+            row = self._conn.execute(
+                "SELECT entry, summary, record FROM reports WHERE path = ? AND entry IS NOT NULL", (path,)
+            ).fetchone()
+            if row:
+                yield row
+
+    def records(self) -> list[dict]:
+        """The generate_csv record of every story, in report order."""
+        rows = self._conn.execute("SELECT path, record FROM reports WHERE entry IS NOT NULL").fetchall()
+        rows.sort(key=lambda row: row[0].split("/"))
+        return [json.loads(record) for _, record in rows]
+
+    def commit(self):
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def load_report(behavior_file: Path, skip_hash: str | None = None,
+                markdown_files: dict[str, str] | None = None) -> tuple:
+    """
+    Read and parse one behaviors report. Returns (content_hash, entry_text,
+    stats, summary, record, uses_metadata, error), where entry_text is the
+    story entry serialised as stored in the manifest and record is its
+    generate_csv record. entry_text, stats, summary and record are None if
+    the report could not be parsed, or if its hash equals skip_hash. Entries
+    that take their genre from metadata are returned with uses_metadata set,
+    for the caller to fill in, so workers never need the metadata index.
+    """
+    try:
+        content = behavior_file.read_text(encoding="utf-8")
+        error = None
+    except Exception as e:
+        content = ""
+        error = str(e)
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    if content_hash == skip_hash:
+        return content_hash, None, None, None, None, False, error
+
+    # Extract JSON
+    data = extract_json(content) if content else None
+    if not data:
+        return content_hash, None, None, None, None, False, error
+
+    uses_metadata = not data.get("genre")
+    story_entry = build_story_entry(behavior_file, data, {}, markdown_files)
+    entry_text = json.dumps(story_entry, indent=2, ensure_ascii=False)
+    return (content_hash, entry_text, story_stats(data), story_summary(story_entry), encode_story(story_entry),
+            uses_metadata, error)
+
+
+def _load_report_task(task: tuple) -> tuple:
+    return load_report(*task)
+
+
+def map_reports(tasks: list[tuple], workers: int = 1):
+    """
+    Run load_report over (behavior_file, skip_hash, markdown_files) tasks, in a process pool
+    when workers > 1. Tasks are sent in chunks to keep pickling overhead low,
+    and results are yielded in task order, so the output matches a serial run.
+    """
+    if workers <= 1 or len(tasks) < 2:
+        for task in tasks:
+            yield load_report(*task)
+        return
+
+    chunksize = max(1, min(64, len(tasks) // (workers * 8)))
+    # Submit a window at a time, one window ahead of the consumer, so
+    # finished results never pile up far beyond what has been written
+    window = chunksize * workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = executor.map(_load_report_task, tasks[:window], chunksize=chunksize)
+        for start in range(window, len(tasks), window):
+            following = executor.map(_load_report_task, tasks[start:start + window], chunksize=chunksize)
+            yield from pending
+            pending = following
+        yield from pending
+
+
+def write_analysis(path: Path, metadata: dict, aggregate_stats: dict, story_texts):
+    """
+    Write analysis.json one story at a time. story_texts yields each story
+    entry already serialised with json.dumps(indent=2), so only one entry is
+    in memory at once; the result is byte-identical to json.dump(output,
+    indent=2) of the whole document. Written to a temporary file and renamed
+    into place, so readers never see a partial file.
+    """
+    # The header is the document with an empty stories list, cut before "[]"
+    header = json.dumps(
+        {"metadata": metadata, "aggregate_stats": aggregate_stats, "stories": []},
+        indent=2, ensure_ascii=False
+    )
+    header = header[:-len("[]\n}")]
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(header)
+        separator = "[\n" + STORY_INDENT
+        for text in story_texts:
+            f.write(separator)
+            # Encoded strings never contain raw newlines, so this only re-indents structure
+            f.write(text.replace("\n", "\n" + STORY_INDENT))
+            separator = ",\n" + STORY_INDENT
+        f.write("[]\n}" if separator.startswith("[") else "\n  ]\n}")
+    os.replace(tmp_path, path)
+
+
+def genre_slug(genre: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", genre.lower()).strip("-") or "unknown"
+
+
+class ShardWriter:
+    """
+    Writes the viewer's data in pieces: analysis/index.json holds the
+    metadata, aggregate_stats and a story_summary() per story, and each
+    story's full entry goes to a detail shard under analysis/details/ that
+    the viewer fetches only when the story is opened or searched. Shards
+    hold up to SHARD_SIZE stories of a single genre, so opening a genre
+    fetches a handful of shards. Only shards whose content changed are
+    rewritten, and shards no longer produced are removed.
+    """
+
+    def __init__(self, shards_dir: Path):
+        self.shards_dir = shards_dir
+        self.details_dir = shards_dir / "details"
+        self.details_dir.mkdir(parents=True, exist_ok=True)
+        self.shards = []  # shard paths relative to shards_dir, in index order
+        self._summaries = []
+        self._open = {}  # genre -> (shard number, [entry_text, ...])
+        self._slugs = {}  # genre -> slug, unique per genre
+        self._chunks = {}  # genre -> number of shards started
+        self._written = 0
+
+    def add(self, entry_text: str, summary_text: str):
+        summary = json.loads(summary_text)
+        genre = summary["genre"]
+        shard, texts = self._open.get(genre, (None, None))
+        if shard is None or len(texts) >= SHARD_SIZE:
+            if shard is not None:
+                self._flush(shard, texts)
+            shard, texts = self._start_shard(genre), []
+            self._open[genre] = (shard, texts)
+        summary["shard"] = shard
+        summary["position"] = len(texts)
+        texts.append(entry_text)
+        self._summaries.append(summary)
+
+    def _start_shard(self, genre: str) -> int:
+        if genre not in self._slugs:
+            slug = genre_slug(genre)
+            taken = set(self._slugs.values())
+            candidate, n = slug, 2
+            while candidate in taken:
+                candidate, n = f"{slug}-{n}", n + 1
+            self._slugs[genre] = candidate
+        chunk = self._chunks.get(genre, 0)
+        self._chunks[genre] = chunk + 1
+        self.shards.append(f"details/{self._slugs[genre]}-{chunk:03d}.json")
+        return len(self.shards) - 1
+
+    def _flush(self, shard: int, texts: list[str]):
+        # A JSON array of the entries as stored, without re-encoding them
+        text = "[\n" + ",\n".join(texts) + "\n]\n"
+        self._written += write_if_changed(self.shards_dir / self.shards[shard], text)
+
+    def close(self, metadata: dict, aggregate_stats: dict) -> int:
+        """Flush the open shards, write the index and prune stale shards; returns shards written."""
+        for shard, texts in self._open.values():
+            self._flush(shard, texts)
+        self._open = {}
+
+        current = {Path(shard).name for shard in self.shards}
+        for f in self.details_dir.iterdir():
+            if f.suffix == ".json" and f.name not in current:
+                f.unlink()
+
+        index = {
+            "metadata": metadata,
+            "aggregate_stats": aggregate_stats,
+            "categories": CATEGORY_KEYS,
+            "shards": self.shards,
+            "stories": self._summaries,
         }
+        # One story per line keeps diffs of the index readable
+        lines = [json.dumps(summary, ensure_ascii=False, separators=(",", ":")) for summary in self._summaries]
+        header = json.dumps({key: value for key, value in index.items() if key != "stories"},
+                            ensure_ascii=False, separators=(",", ":"))
+        text = header[:-1] + ',"stories":[\n' + ",\n".join(lines) + "\n]}\n"
+        write_if_changed(self.shards_dir / "index.json", text)
+        return self._written
+
+
+def aggregate_reports(full: bool = False, workers: int = 1, csv_dimensions: list | None = None):
+    """
+    Aggregate all reports into a single analysis file. With csv_dimensions,
+    also regenerate csv/ from the same pass, grouping its breakdowns by those
+    dimensions.
+    """
+    print("Aggregating analysis reports...")
+
+    manifest = ReportManifest(MANIFEST_FILE)
+    if full:
+        manifest.clear()
 
-        stories.append(story_entry)
+    # Metadata is only needed for reports without a genre of their own;
+    # if metadata.json changed, those reports are rebuilt
+    metadata_fingerprint = file_fingerprint(METADATA_FILE)
+    metadata_changed = manifest.get_meta("metadata") != metadata_fingerprint
+    metadata_store = None
+
+    def get_story_metadata(file: str) -> dict:
+        nonlocal metadata_store
+        if metadata_store is None:
+            metadata_store = MetadataStore()
+        return metadata_store.get(file, {})
+
+    # Find all behavior JSON files
+    reports = scan_reports(REPORTS_DIR)
+    print(f"  Found {len(reports)} behavior reports")
+
+    known = manifest.index()
+    aggregate_stats = manifest.get_meta("aggregate_stats") if known else None
+    if aggregate_stats is None:
+        aggregate_stats = new_aggregate_stats()
+    unchanged = added = changed = 0
+
+    # Stat every report; only new or changed ones are read
+    work = []
+    for behavior_file, dir_entry, markdown_reports in reports:
+        key = behavior_file.relative_to(REPORTS_DIR).as_posix()
+        stat = dir_entry.stat()
+        companions = json.dumps(markdown_report_signature(markdown_reports))
+        markdown_files = {report_key: entry.name for report_key, entry in markdown_reports.items()}
+
+        old = known.pop(key, None)
+        skip_hash = None
+        if old is not None:
+            old_mtime, old_size, old_hash, old_companions, old_uses_metadata, _ = old
+            if old_companions == companions and not (metadata_changed and old_uses_metadata):
+                if (old_mtime, old_size) == (stat.st_mtime_ns, stat.st_size):
+                    unchanged += 1
+                    continue
+                # Only the report itself may have changed: skip parsing if its content didn't
+                skip_hash = old_hash
+        work.append((behavior_file, key, stat, companions, old, skip_hash, markdown_files))
+
+    results = map_reports([(item[0], item[5], item[6]) for item in work], workers)
+
+    for (behavior_file, key, stat, companions, old, skip_hash, _), result in zip(work, results):
+        content_hash, entry_text, stats, summary, record, uses_metadata, error = result
+        print(f"  Processing {behavior_file.name}...")
+        if error:
+            print(f"  Error reading {behavior_file}: {error}")
 
-        # Aggregate stats
-        summary = data.get("summary", {})
-        for key in aggregate_stats["by_category"]:
-            aggregate_stats["by_category"][key] += summary.get(key, 0)
+        if skip_hash is not None and skip_hash == content_hash:
+            # Touched but not modified
+            manifest.touch(key, stat.st_mtime_ns, stat.st_size)
+            unchanged += 1
+            continue
 
-        # Count portrayals from behaviors
-        for behavior in data.get("behaviors", []):
-            portrayal = behavior.get("portrayal", "").lower()
-            if portrayal in aggregate_stats["by_portrayal"]:
-                aggregate_stats["by_portrayal"][portrayal] += 1
+        if old is None:
+            added += 1
+        else:
+            changed += 1
+            if old[-1] is not None:
+                add_stats(aggregate_stats, json.loads(old[-1]), -1)
 
-        # Backfire risk
-        aggregate_stats["backfire_risk"] += summary.get("positive_portrayal_of_misaligned", 0)
+        if entry_text is None:
+            print(f"    Skipping - could not parse JSON")
+            manifest.put(key, stat.st_mtime_ns, stat.st_size, content_hash, companions, False, None, None, None, None)
+            continue
 
-        # Assessment
-        assessment = data.get("project_assessment", {}).get("success_level", "").lower()
-        if assessment in aggregate_stats["by_assessment"]:
-            aggregate_stats["by_assessment"][assessment] += 1
+        if uses_metadata:
+            story_entry = json.loads(entry_text)
+            story_metadata = get_story_metadata(story_entry["file"])
+            story_entry["genre"] = story_metadata.get("genre", "Unknown")
+            entry_text = json.dumps(story_entry, indent=2, ensure_ascii=False)
+            summary["genre"] = record["genre"] = story_entry["genre"]
+        add_stats(aggregate_stats, stats)
+        manifest.put(key, stat.st_mtime_ns, stat.st_size, content_hash, companions, uses_metadata,
+                     entry_text, stats, summary, record)
+
+    # Anything left in the index no longer has a report
+    for key, old in known.items():
+        old_stats = old[-1]
+        if old_stats is not None:
+            add_stats(aggregate_stats, json.loads(old_stats), -1)
+        manifest.delete(key)
+
+    if metadata_store is not None:
+        metadata_store.close()
+    print(f"  {unchanged} unchanged, {added} added, {changed} changed, {len(known)} removed")
+
+    # The revision counts aggregations that changed any story, so outputs
+    # built from the manifest can tell whether they are out of date
+    if added or changed or known:
+        manifest.set_meta("revision", (manifest.get_meta("revision") or 0) + 1)
+    manifest.set_meta("aggregate_stats", aggregate_stats)
+    manifest.set_meta("metadata", metadata_fingerprint)
+    manifest.commit()
 
     # Build final output
+    story_count = manifest.entry_count()
     total_behaviors = sum(aggregate_stats["by_category"].values())
-
-    output = {
-        "metadata": {
-            "total_stories": len(stories),
-            "total_behaviors": total_behaviors,
-            "generated_date": datetime.now().strftime("%Y-%m-%d"),
-            "corpus_source": "hyperstition",
-        },
-        "aggregate_stats": aggregate_stats,
-        "stories": stories,
+    metadata = {
+        "total_stories": story_count,
+        "total_behaviors": total_behaviors,
+        "generated_date": datetime.now().strftime("%Y-%m-%d"),
+        "corpus_source": "hyperstition",
     }
 
-    # Write output
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    # Write output, streaming stories from the manifest in report order;
+    # the viewer's index and detail shards, the behaviors table if any story
+    # changed, and the CSV records if asked for, are filled in on the way past
+    keys = (behavior_file.relative_to(REPORTS_DIR).as_posix() for behavior_file, _, _ in reports)
+    shard_writer = ShardWriter(SHARDS_DIR)
+    table_stale = added or changed or known or not table_is_current(TABLE_DIR)
+    table_writer = BehaviorsTableWriter(TABLE_DIR) if table_stale else None
+    csv_stale = csv_dimensions and not csv_is_current(manifest, csv_dimensions)
+    csv_records = []
+
+    def story_texts():
+        for entry_text, summary_text, record_text in manifest.entries(keys):
+            shard_writer.add(entry_text, summary_text)
+            if table_writer:
+                table_writer.add_story(json.loads(entry_text))
+            if csv_stale:
+                csv_records.append(json.loads(record_text))
+            yield entry_text
+
+    write_analysis(OUTPUT_FILE, metadata, aggregate_stats, story_texts())
+    shards_written = shard_writer.close(metadata, aggregate_stats)
+    if table_writer:
+        table_writer.close()
 
     file_size = OUTPUT_FILE.stat().st_size / 1024
     print(f"\nWritten to {OUTPUT_FILE.name} ({file_size:.1f} KB)")
-    print(f"  {len(stories)} stories, {total_behaviors} behaviors")
+    index_size = (SHARDS_DIR / "index.json").stat().st_size / 1024
+    print(f"Written viewer index to {SHARDS_DIR.name}/index.json ({index_size:.1f} KB), "
+          f"{shards_written} of {len(shard_writer.shards)} detail shards changed")
+    if table_writer:
+        print(f"Written behaviors table to {TABLE_DIR.name}/ ({table_writer.rows} rows)")
+    print(f"  {story_count} stories, {total_behaviors} behaviors")
     print(f"  Backfire risk behaviors: {aggregate_stats['backfire_risk']}")
 
+    if csv_stale:
+        generate_csv_files(csv_records, csv_dimensions)
+        mark_csv_current(manifest, csv_dimensions)
+    elif csv_dimensions:
+        print(f"\n{CSV_DIR.name}/ is up to date")
+    manifest.close()
+
+
+def csv_stamp(manifest: ReportManifest, csv_dimensions: list) -> dict:
+    """What csv/ depends on: the manifest revision, the breakdown dimensions and metadata.json (for authors)."""
+    return {
+        "revision": manifest.get_meta("revision"),
+        "dimensions": csv_dimensions,
+        "metadata": file_fingerprint(METADATA_FILE),
+    }
+
+
+def csv_is_current(manifest: ReportManifest, csv_dimensions: list) -> bool:
+    """Whether csv/ was last generated from this manifest revision with the same options."""
+    return (
+        manifest.get_meta("csv") == csv_stamp(manifest, csv_dimensions)
+        and all((CSV_DIR / name).exists() for name in CSV_OUTPUTS)
+    )
+
+
+def mark_csv_current(manifest: ReportManifest, csv_dimensions: list):
+    manifest.set_meta("csv", csv_stamp(manifest, csv_dimensions))
+    manifest.commit()
+
+
+def refresh_csv(csv_dimensions: list):
+    """Regenerate csv/ from the manifest alone, as of the last aggregation."""
+    print(f"Generating CSV reports from {MANIFEST_FILE.name}...")
+    manifest = ReportManifest(MANIFEST_FILE)
+    try:
+        if csv_is_current(manifest, csv_dimensions):
+            print(f"  {CSV_DIR.name}/ is up to date")
+            return
+        records = manifest.records()
+        if not records:
+            print("  No stories in the manifest; run aggregate_analysis.py first")
+            return
+        print(f"  Loaded {len(records)} stories")
+        generate_csv_files(records, csv_dimensions)
+        mark_csv_current(manifest, csv_dimensions)
+    finally:
+        manifest.close()
+
 
 def main():
-    aggregate_reports()
+    parser = argparse.ArgumentParser(description="Aggregate story reports into analysis.json")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the manifest and re-read every report"
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=1,
+        help="Processes used to read and parse reports (default: 1)"
+    )
+    parser.add_argument(
+        "--csv",
+        action="store_true",
+        help=f"Also regenerate {CSV_DIR.name}/ (as generate_csv.py does) in the same pass"
+    )
+    parser.add_argument(
+        "--csv-only",
+        action="store_true",
+        help=f"Only regenerate {CSV_DIR.name}/, from the manifest, without scanning reports or writing analysis.json"
+    )
+    parser.add_argument(
+        "--group-by",
+        nargs="+",
+        default=DEFAULT_GROUP_DIMENSIONS,
+        choices=list(GROUP_DIMENSIONS),
+        help=f"Dimensions for the CSV breakdowns (default: {' '.join(DEFAULT_GROUP_DIMENSIONS)})"
+    )
+
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    if args.csv_only:
+        refresh_csv(args.group_by)
+        return
+
+    aggregate_reports(full=args.full, workers=args.workers, csv_dimensions=args.group_by if args.csv else None)
 
 
 if __name__ == "__main__":
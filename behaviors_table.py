@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Columnar table of every behavior in analysis.json, for fast analytic scans.
+
+One row per behavior. Categorical columns are dictionary-encoded: each is a
+little-endian unsigned integer array of codes (<column>.codes) indexing the
+column's list of distinct values in table.json. Free-text columns are kept
+apart so scans never read them: <column>.text holds the UTF-8 strings back
+to back, and <column>.offsets (uint64, one more entry than rows) gives each
+row's byte range. Everything loads with the standard array module, or
+straight into NumPy with numpy.fromfile(path, dtype=<dtype in table.json>).
+
+Written by aggregate_analysis.py. To query it:
+
+    python3 behaviors_table.py                              # counts by benevolence/alignment/portrayal
+    python3 behaviors_table.py --group-by genre portrayal
+
+    from behaviors_table import BehaviorsTable
+    table = BehaviorsTable.load(Path("behaviors"))
+    table.group_counts("genre", "benevolence")
+"""
+
+import argparse
+import array
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+TABLE_DIR = SCRIPT_DIR / "behaviors"
+TABLE_VERSION = 1
+
+# story, genre and batch are the story's values, repeated on each of its behaviors
+CATEGORICAL_COLUMNS = ["story", "character", "benevolence", "alignment", "portrayal", "genre", "batch"]
+TEXT_COLUMNS = ["description", "quote"]
+
+# (array typecode, NumPy dtype, number of codes it can hold), smallest first
+CODE_TYPES = [("B", "<u1", 1 << 8), ("H", "<u2", 1 << 16), ("I", "<u4", 1 << 32)]
+OFFSET_TYPE = ("Q", "<u8")
+
+
+def write_array(path: Path, values: array.array):
+    """Write an array in little-endian byte order, replacing path atomically."""
+    if sys.byteorder == "big":
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        values.tofile(f)
+    os.replace(tmp_path, path)
+
+
+def read_array(path: Path, typecode: str) -> array.array:
+    values = array.array(typecode)
+    with open(path, "rb") as f:
+        values.frombytes(f.read())
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def table_is_current(table_dir: Path) -> bool:
+    """True if table_dir holds a complete table in the current format."""
+    try:
+        info = json.loads((table_dir / "table.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return info.get("version") == TABLE_VERSION
+
+
+def categorical_value(value):
+    """Dictionary values are JSON scalars; anything else is stored as its JSON text."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+class BehaviorsTableWriter:
+    """
+    Builds the table one story at a time. Codes are kept as 32-bit arrays
+    while building and narrowed to the smallest type on close(); text is
+    streamed to disk as it arrives. table.json is written last, so readers
+    only see a table once all of its columns are in place.
+    """
+
+    def __init__(self, table_dir: Path):
+        self.table_dir = table_dir
+        self.table_dir.mkdir(parents=True, exist_ok=True)
+        self.rows = 0
+        self._dictionaries = {column: {} for column in CATEGORICAL_COLUMNS}
+        self._codes = {column: array.array("I") for column in CATEGORICAL_COLUMNS}
+        self._offsets = {column: array.array(OFFSET_TYPE[0], [0]) for column in TEXT_COLUMNS}
+        self._text_files = {
+            column: open(table_dir / f"{column}.text.tmp", "wb") for column in TEXT_COLUMNS
+        }
+
+    def add_story(self, story_entry: dict):
+        story_values = {"story": story_entry["file"], "genre": story_entry["genre"], "batch": story_entry["batch"]}
+        for behavior in story_entry.get("behaviors", []):
+            for column in CATEGORICAL_COLUMNS:
+                value = story_values[column] if column in story_values else behavior.get(column)
+                dictionary = self._dictionaries[column]
+                value = categorical_value(value)
+                code = dictionary.get(value)
+                if code is None:
+                    code = dictionary[value] = len(dictionary)
+                self._codes[column].append(code)
+
+            for column in TEXT_COLUMNS:
+                data = str(behavior.get(column) or "").encode("utf-8")
+                self._text_files[column].write(data)
+                offsets = self._offsets[column]
+                offsets.append(offsets[-1] + len(data))
+
+            self.rows += 1
+
+    def close(self):
+        info = {"version": TABLE_VERSION, "rows": self.rows, "columns": {}, "text_columns": {}}
+
+        for column in CATEGORICAL_COLUMNS:
+            dictionary = self._dictionaries[column]
+            typecode, dtype = next((t, d) for t, d, limit in CODE_TYPES if len(dictionary) <= limit)
+            write_array(self.table_dir / f"{column}.codes", array.array(typecode, self._codes[column]))
+            info["columns"][column] = {
+                "file": f"{column}.codes",
+                "dtype": dtype,
+                "values": list(dictionary),
+            }
+
+        for column in TEXT_COLUMNS:
+            self._text_files[column].close()
+            os.replace(self.table_dir / f"{column}.text.tmp", self.table_dir / f"{column}.text")
+            write_array(self.table_dir / f"{column}.offsets", self._offsets[column])
+            info["text_columns"][column] = {
+                "file": f"{column}.text",
+                "offsets": f"{column}.offsets",
+                "dtype": OFFSET_TYPE[1],
+            }
+
+        tmp_path = self.table_dir / "table.json.tmp"
+        tmp_path.write_text(json.dumps(info, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.table_dir / "table.json")
+
+
+class BehaviorsTable:
+    """Read access to a table written by BehaviorsTableWriter. Columns are loaded on first use."""
+
+    def __init__(self, table_dir: Path, info: dict):
+        self.table_dir = table_dir
+        self.info = info
+        self.rows = info["rows"]
+        self._codes = {}
+        self._offsets = {}
+
+    @classmethod
+    def load(cls, table_dir: Path = TABLE_DIR) -> "BehaviorsTable":
+        info = json.loads((table_dir / "table.json").read_text(encoding="utf-8"))
+        if info.get("version") != TABLE_VERSION:
+            raise ValueError(f"{table_dir} has table version {info.get('version')}, expected {TABLE_VERSION}")
+        return cls(table_dir, info)
+
+    def values(self, column: str) -> list:
+        """Distinct values of a categorical column, indexed by code."""
+        return self.info["columns"][column]["values"]
+
+    def codes(self, column: str) -> array.array:
+        """Per-row codes of a categorical column."""
+        if column not in self._codes:
+            spec = self.info["columns"][column]
+            typecode = next(t for t, d, _ in CODE_TYPES if d == spec["dtype"])
+            self._codes[column] = read_array(self.table_dir / spec["file"], typecode)
+        return self._codes[column]
+
+    def column(self, column: str) -> list:
+        """Per-row values of a categorical column."""
+        values = self.values(column)
+        return [values[code] for code in self.codes(column)]
+
+    def text(self, column: str, row: int) -> str:
+        """One row of a text column, read without loading the rest."""
+        offsets = self._text_offsets(column)
+        start, end = offsets[row], offsets[row + 1]
+        with open(self.table_dir / self.info["text_columns"][column]["file"], "rb") as f:
+            f.seek(start)
+            return f.read(end - start).decode("utf-8")
+
+    def texts(self, column: str) -> list[str]:
+        """Every row of a text column."""
+        offsets = self._text_offsets(column)
+        data = (self.table_dir / self.info["text_columns"][column]["file"]).read_bytes()
+        return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(self.rows)]
+
+    def _text_offsets(self, column: str) -> array.array:
+        if column not in self._offsets:
+            spec = self.info["text_columns"][column]
+            self._offsets[column] = read_array(self.table_dir / spec["offsets"], OFFSET_TYPE[0])
+        return self._offsets[column]
+
+    def group_counts(self, *columns: str) -> dict[tuple, int]:
+        """Number of rows for each combination of values of the given categorical columns."""
+        counts = Counter(zip(*(self.codes(column) for column in columns)))
+        values = [self.values(column) for column in columns]
+        return {
+            tuple(column_values[code] for column_values, code in zip(values, key)): count
+            for key, count in counts.items()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the columnar behaviors table")
+    parser.add_argument(
+        "--table",
+        type=Path,
+        default=TABLE_DIR,
+        help=f"Table directory (default: {TABLE_DIR.name}/)"
+    )
+    parser.add_argument(
+        "--group-by",
+        nargs="+",
+        default=["benevolence", "alignment", "portrayal"],
+        choices=CATEGORICAL_COLUMNS,
+        help="Columns to count behaviors by (default: benevolence alignment portrayal)"
+    )
+
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = BehaviorsTable.load(args.table)
+    counts = table.group_counts(*args.group_by)
+    elapsed = time.perf_counter() - start
+
+    print(f"{table.rows} behaviors, {len(counts)} groups ({elapsed * 1000:.1f} ms)\n")
+    for key, count in sorted(counts.items(), key=lambda item: -item[1]):
+        print(f"  {count:>7}  {' / '.join(str(value) for value in key)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for the processing pipeline.
+
+Generates a synthetic corpus, then runs the real scripts against it with the
+"mock" model: story selection -> processing -> report write (process_stories.py)
+followed by aggregate_analysis.py. Reports stories/sec, p50/p99 per-story
+latency and peak RSS for each stage.
+
+    python3 benchmark.py -n 5000 -j 8
+    python3 benchmark.py -n 50000 -j 32 --latency 0.05 --failure-rate 0.02 --malformed-rate 0.02
+
+With --discovery, instead compares report discovery in aggregate_analysis.py
+on a synthetic reports tree: the old per-story exists() probes against one
+os.scandir listing per directory, counting filesystem calls and wall time.
+
+    python3 benchmark.py --discovery -n 50000
+"""
+
+import argparse
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aggregate_analysis import REPORT_PATTERNS, scan_reports
+from process_stories import CORPUS_DIRECTORIES, read_processing_log
+
+SCRIPT_DIR = Path(__file__).parent
+PIPELINE_SCRIPTS = [
+    "process_stories.py", "aggregate_analysis.py", "behaviors_table.py", "generate_csv.py", "metadata_store.py",
+    "corpus_archive.py", "download_corpus.py",
+]
+
+DEFAULT_STORIES = 5000
+DEFAULT_JOBS = 8
+DEFAULT_STORY_SIZE = 4000  # characters of body text per story
+COMPANION_RATE = 0.01  # fraction of synthetic reports with markdown companion reports
+
+WORDS = (
+    "the machine watched river light signal quiet archive storm lantern circuit "
+    "promise harbor echo garden winter protocol memory city voice door"
+).split()
+
+
+def generate_corpus(base_dir: Path, count: int, story_size: int, seed: int = 0):
+    """Write `count` synthetic stories spread evenly across CORPUS_DIRECTORIES."""
+    rng = random.Random(seed)
+    for dir_name in CORPUS_DIRECTORIES:
+        (base_dir / dir_name).mkdir(parents=True, exist_ok=True)
+
+    for i in range(count):
+        dir_name = CORPUS_DIRECTORIES[i % len(CORPUS_DIRECTORIES)]
+        words = []
+        length = 0
+        target = rng.randint(story_size // 2, story_size * 3 // 2)
+        while length < target:
+            word = rng.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        content = (
+            f"# Synthetic Story {i:06d}\n\n"
+            f"**Author:** Benchmark\n"
+            f"**Genre:** Science Fiction\n\n"
+            f"{' '.join(words)}\n"
+        )
+        (base_dir / dir_name / f"synthetic-story-{i:06d}.md").write_text(content, encoding="utf-8")
+
+
+def generate_report_tree(reports_dir: Path, count: int, seed: int = 0):
+    """Write `count` minimal behaviors reports, a few with markdown companions, across CORPUS_DIRECTORIES."""
+    rng = random.Random(seed)
+    for dir_name in CORPUS_DIRECTORIES:
+        (reports_dir / dir_name).mkdir(parents=True, exist_ok=True)
+
+    for i in range(count):
+        story_dir = reports_dir / CORPUS_DIRECTORIES[i % len(CORPUS_DIRECTORIES)]
+        stem = f"synthetic-story-{i:06d}"
+        (story_dir / f"{stem}-behaviors.json").write_text("{}", encoding="utf-8")
+        if rng.random() < COMPANION_RATE:
+            for _, suffix in rng.sample(REPORT_PATTERNS, 2):
+                (story_dir / f"{stem}{suffix}").write_text("report", encoding="utf-8")
+
+
+def probe_reports(reports_dir: Path) -> list[tuple[Path, dict[str, Path]]]:
+    """Report discovery as aggregate_analysis.py used to do it: rglob, then exists() on every candidate."""
+    found = []
+    for behavior_file in sorted(reports_dir.rglob("*-behaviors.json")):
+        story_stem = behavior_file.stem.replace("-behaviors", "")
+        companions = {}
+        for report_key, suffix in REPORT_PATTERNS:
+            filepath = behavior_file.parent / f"{story_stem}{suffix}"
+            if filepath.exists():
+                companions[report_key] = filepath
+        found.append((behavior_file, companions))
+    return found
+
+
+def list_reports(reports_dir: Path) -> list[tuple[Path, dict[str, Path]]]:
+    """Report discovery via aggregate_analysis.scan_reports(), in the same shape as probe_reports()."""
+    return [
+        (behavior_file, {key: Path(entry.path) for key, entry in markdown_reports.items()})
+        for behavior_file, _, markdown_reports in scan_reports(reports_dir)
+    ]
+
+
+def count_filesystem_calls(func, *args):
+    """Run func(*args), counting stat and directory-listing calls; return (result, calls)."""
+    counted = ("stat", "lstat", "scandir", "listdir")
+    originals = {name: getattr(os, name) for name in counted}
+    calls = 0
+
+    def counting(original):
+        def wrapper(*a, **kw):
+            nonlocal calls
+            calls += 1
+            return original(*a, **kw)
+        return wrapper
+
+    for name, original in originals.items():
+        setattr(os, name, counting(original))
+    try:
+        result = func(*args)
+    finally:
+        for name, original in originals.items():
+            setattr(os, name, original)
+    return result, calls
+
+
+def run_discovery_benchmark(workdir: Path, count: int):
+    """Compare per-story probing with per-directory listing on a synthetic reports tree."""
+    reports_dir = workdir / "reports"
+    print(f"Generating {count} synthetic reports in {reports_dir}...")
+    generate_report_tree(reports_dir, count)
+
+    # Warm the directory cache so both runs see the same conditions
+    probe_reports(reports_dir)
+
+    print(f"\n{'Method':<22} {'Reports':>9} {'FS calls':>10} {'Wall':>9}")
+    results = []
+    for label, func in (("exists() probes", probe_reports), ("scandir listing", list_reports)):
+        # Time without the counting wrappers, which would add their own overhead
+        start = time.perf_counter()
+        found = func(reports_dir)
+        elapsed = time.perf_counter() - start
+        _, calls = count_filesystem_calls(func, reports_dir)
+        results.append(found)
+        print(f"{label:<22} {len(found):>9} {calls:>10} {elapsed:>8.3f}s")
+
+    if results[0] != results[1]:
+        print("\nWARNING: the two methods found different reports")
+
+
+def run_stage(args: list[str], cwd: Path, env: dict) -> tuple[float, int, float]:
+    """Run one pipeline script; return (wall_seconds, exit_code, peak_rss_mb)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable] + args,
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    # wait4 gives resource usage for this child alone, not all children so far
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    rss_bytes = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return elapsed, os.waitstatus_to_exitcode(status), rss_bytes / 1e6
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def load_latencies(logs_dir: Path) -> tuple[list[float], int]:
+    """Read per-story latencies and the failure count from the processing log."""
+    log_files = sorted(logs_dir.glob("processing-*.jsonl"))
+    if not log_files:
+        return [], 0
+    log = read_processing_log(log_files[-1])
+    latencies = [story["elapsed_seconds"] for story in log["stories"]]
+    return latencies, sum(1 for story in log["stories"] if not story["success"])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the processing pipeline on a synthetic corpus using the mock model"
+    )
+    parser.add_argument(
+        "-n", "--stories",
+        type=int,
+        default=DEFAULT_STORIES,
+        help=f"Number of synthetic stories (default: {DEFAULT_STORIES})"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Concurrent stories passed to process_stories.py (default: {DEFAULT_JOBS})"
+    )
+    parser.add_argument(
+        "--story-size",
+        type=int,
+        default=DEFAULT_STORY_SIZE,
+        help=f"Average story body size in characters (default: {DEFAULT_STORY_SIZE})"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Mean mock model latency in seconds (default: 0)"
+    )
+    parser.add_argument(
+        "--failure-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of mock calls that fail (default: 0)"
+    )
+    parser.add_argument(
+        "--malformed-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of mock calls that return malformed JSON (default: 0)"
+    )
+    parser.add_argument(
+        "--discovery",
+        action="store_true",
+        help="Benchmark report discovery in aggregate_analysis.py instead of the pipeline"
+    )
+    parser.add_argument(
+        "--workdir",
+        type=Path,
+        default=None,
+        help="Directory for the synthetic tree (default: a temporary directory, removed afterwards)"
+    )
+
+    args = parser.parse_args()
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="hyperstition-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        if args.discovery:
+            run_discovery_benchmark(workdir, args.stories)
+            return
+
+        print(f"Generating {args.stories} synthetic stories in {workdir}...")
+        start = time.perf_counter()
+        generate_corpus(workdir, args.stories, args.story_size)
+        print(f"  Generated in {time.perf_counter() - start:.1f}s")
+
+        # Run copies of the scripts so their paths resolve inside the synthetic tree
+        for script in PIPELINE_SCRIPTS:
+            shutil.copy2(SCRIPT_DIR / script, workdir / script)
+
+        env = dict(os.environ)
+        env["MOCK_LATENCY"] = str(args.latency)
+        env["MOCK_FAILURE_RATE"] = str(args.failure_rate)
+        env["MOCK_MALFORMED_RATE"] = str(args.malformed_rate)
+
+        print(f"Processing with mock model, {args.jobs} jobs...")
+        process_time, _, process_rss = run_stage(
+            ["process_stories.py", "-m", "mock", "-n", str(args.stories), "-j", str(args.jobs), "--no-cache"],
+            workdir, env
+        )
+        latencies, failed = load_latencies(workdir / "logs")
+
+        print("Aggregating...")
+        aggregate_time, aggregate_code, aggregate_rss = run_stage(["aggregate_analysis.py"], workdir, env)
+        if aggregate_code != 0:
+            print("  aggregate_analysis.py failed")
+
+        processed = len(latencies)
+        print(f"\n{'=' * 50}")
+        print(f"Stories: {processed} processed, {failed} failed")
+        print(f"\n{'Stage':<12} {'Wall':>9} {'Stories/s':>11} {'p50':>9} {'p99':>9} {'Peak RSS':>10}")
+        print(
+            f"{'process':<12} {process_time:>8.2f}s {processed / process_time:>11.1f} "
+            f"{percentile(latencies, 50) * 1000:>7.1f}ms {percentile(latencies, 99) * 1000:>7.1f}ms "
+            f"{process_rss:>8.1f}MB"
+        )
+        print(
+            f"{'aggregate':<12} {aggregate_time:>8.2f}s {processed / aggregate_time:>11.1f} "
+            f"{'-':>9} {'-':>9} {aggregate_rss:>8.1f}MB"
+        )
+        total_time = process_time + aggregate_time
+        print(f"{'total':<12} {total_time:>8.2f}s {processed / total_time:>11.1f}")
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Read corpus stories straight from the downloaded zips, without extracting them.
+
+Hyperstition Corpus v1.zip holds one nested zip per corpus directory
+("0 Claude 500.zip", ...), and each nested zip holds that directory's
+stories. CorpusArchive opens the nested zips in place. A nested zip stored
+without compression is read through a seekable view of its bytes in the
+outer file, so reading a story reads only that story; a compressed one is
+decompressed into memory once. Nested zips left next to the scripts by
+download_corpus.py --extract-l1 are opened directly.
+
+Archived stories keep the path they would have once extracted
+(<base_dir>/<directory>/<name>.md), so process_stories.py and
+extract_metadata.py handle them like any other story: list_stories(),
+story_size() and open_story() use a directory on disk when it exists and
+fall back to the archive for directories that were never extracted.
+
+    python3 corpus_archive.py                   # stories per directory in the archive
+    python3 corpus_archive.py "0 Claude 500"    # list one directory's stories
+"""
+
+import argparse
+import io
+import os
+import struct
+import threading
+import zipfile
+from pathlib import Path
+
+from download_corpus import CORPUS_ZIP
+
+SCRIPT_DIR = Path(__file__).parent
+
+# Zip local file header; the member's data follows its file name and extra field
+LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+
+def member_name(info: zipfile.ZipInfo) -> str:
+    """File name of a zip member, without its directories."""
+    return info.filename.rpartition("/")[2]
+
+
+def is_member(info: zipfile.ZipInfo, suffix: str) -> bool:
+    """True for a file with the given suffix, ignoring macOS resource fork entries."""
+    return info.filename.endswith(suffix) and not info.filename.startswith("__MACOSX/")
+
+
+class MemberView(io.RawIOBase):
+    """
+    Read-only, seekable view of a zip member stored without compression,
+    read straight from the zip file at path. Each view has its own file
+    handle, so it can be read independently of the zip that contains it.
+    """
+
+    def __init__(self, path: Path, info: zipfile.ZipInfo):
+        self._file = open(path, "rb")
+        self._file.seek(info.header_offset)
+        header = self._file.read(LOCAL_HEADER.size)
+        if len(header) != LOCAL_HEADER.size or not header.startswith(LOCAL_HEADER_SIGNATURE):
+            self._file.close()
+            raise zipfile.BadZipFile(f"Bad local header for {info.filename} in {path}")
+        fields = LOCAL_HEADER.unpack(header)
+        self._start = info.header_offset + LOCAL_HEADER.size + fields[10] + fields[11]
+        self._size = info.compress_size
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}[whence]
+        if base + offset < 0:
+            raise ValueError("negative seek position")
+        self._pos = base + offset
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        count = max(0, min(len(buffer), self._size - self._pos))
+        if not count:
+            return 0
+        self._file.seek(self._start + self._pos)
+        count = self._file.readinto(memoryview(buffer)[:count])
+        self._pos += count
+        return count
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+class CorpusArchive:
+    """
+    The corpus directories available as nested zips in base_dir, either as
+    files of their own or as members of the corpus zip. Nested zips are
+    opened on first use. Stories can be read from several threads at once.
+    """
+
+    def __init__(self, base_dir: Path = SCRIPT_DIR):
+        self.base_dir = base_dir
+        self._lock = threading.Lock()
+        self._outer = None
+        # directory -> nested zip: a Path on disk, or a ZipInfo in the corpus zip
+        self._sources = {}
+        # directory -> (nested ZipFile, {story name: ZipInfo} in name order)
+        self._nested = {}
+        self._views = []
+
+        corpus_zip = base_dir / CORPUS_ZIP
+        if corpus_zip.exists():
+            self._outer = zipfile.ZipFile(corpus_zip)
+            for info in self._outer.infolist():
+                if is_member(info, ".zip"):
+                    self._sources[member_name(info)[:-len(".zip")]] = info
+        for path in base_dir.glob("*.zip"):
+            if path.name != CORPUS_ZIP:
+                self._sources[path.stem] = path
+
+    def directories(self) -> list[str]:
+        """Names of the corpus directories in the archive."""
+        return sorted(self._sources)
+
+    def source(self, dir_name: str) -> str:
+        """Where a directory's nested zip is read from, for display."""
+        source = self._sources[dir_name]
+        if isinstance(source, Path):
+            return source.name
+        method = "stored" if source.compress_type == zipfile.ZIP_STORED else "compressed"
+        return f"{CORPUS_ZIP} ({method})"
+
+    def _directory(self, dir_name: str) -> tuple[zipfile.ZipFile, dict] | None:
+        with self._lock:
+            if dir_name not in self._nested:
+                self._nested[dir_name] = self._open_nested(dir_name)
+            return self._nested[dir_name]
+
+    def _open_nested(self, dir_name: str) -> tuple[zipfile.ZipFile, dict] | None:
+        source = self._sources.get(dir_name)
+        if source is None:
+            return None
+        if isinstance(source, Path):
+            nested = zipfile.ZipFile(source)
+        elif source.compress_type == zipfile.ZIP_STORED:
+            view = MemberView(Path(self._outer.filename), source)
+            self._views.append(view)
+            nested = zipfile.ZipFile(view)
+        else:
+            # Seeking in a compressed member means decompressing it again from the start
+            nested = zipfile.ZipFile(io.BytesIO(self._outer.read(source)))
+
+        stories = {member_name(info): info for info in nested.infolist() if is_member(info, ".md")}
+        return nested, dict(sorted(stories.items()))
+
+    def stories(self, dir_name: str) -> dict[str, zipfile.ZipInfo]:
+        """Story file name -> ZipInfo for one directory, in name order; empty if it isn't in the archive."""
+        directory = self._directory(dir_name)
+        return directory[1] if directory else {}
+
+    def open(self, dir_name: str, name: str) -> zipfile.ZipExtFile:
+        """Open one story for reading as bytes; it is decompressed as it is read."""
+        directory = self._directory(dir_name)
+        if directory is None or name not in directory[1]:
+            raise FileNotFoundError(f"{dir_name}/{name} is not in the corpus archive")
+        nested, stories = directory
+        return nested.open(stories[name])
+
+    def close(self):
+        with self._lock:
+            for directory in self._nested.values():
+                if directory:
+                    directory[0].close()
+            for view in self._views:
+                view.close()
+            if self._outer:
+                self._outer.close()
+            self._nested.clear()
+            self._views.clear()
+
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def _forget_archives():
+    # A forked child shares its parent's file offsets, so it opens archives of its own
+    global _archives_lock
+    _archives.clear()
+    _archives_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_archives)
+
+
+def get_archive(base_dir: Path) -> CorpusArchive | None:
+    """base_dir's corpus archive, opened once per process; None if base_dir has no corpus zips."""
+    with _archives_lock:
+        if base_dir not in _archives:
+            archive = CorpusArchive(base_dir)
+            if not archive.directories():
+                archive.close()
+                archive = None
+            _archives[base_dir] = archive
+        return _archives[base_dir]
+
+
+def archived_story(story_path: Path) -> tuple[CorpusArchive, zipfile.ZipInfo] | None:
+    """The archive and entry holding a story that would be at story_path once extracted, if any."""
+    archive = get_archive(story_path.parent.parent)
+    if archive is None:
+        return None
+    info = archive.stories(story_path.parent.name).get(story_path.name)
+    return (archive, info) if info else None
+
+
+def list_stories(corpus_dir: Path) -> list[Path]:
+    """
+    Story paths of one corpus directory, in name order: its .md files if it
+    has been extracted, otherwise the stories in its nested zip.
+    """
+    if corpus_dir.is_dir():
+        return sorted(f for f in corpus_dir.iterdir() if f.suffix == ".md")
+    archive = get_archive(corpus_dir.parent)
+    if archive is None:
+        return []
+    return [corpus_dir / name for name in archive.stories(corpus_dir.name)]
+
+
+def open_story(story_path: Path, encoding: str = "utf-8") -> io.TextIOBase:
+    """Open a story as text, from disk or else from the corpus archive."""
+    try:
+        return open(story_path, "r", encoding=encoding)
+    except FileNotFoundError:
+        archived = archived_story(story_path)
+        if archived is None:
+            raise
+    archive, _ = archived
+    return io.TextIOWrapper(archive.open(story_path.parent.name, story_path.name), encoding=encoding)
+
+
+def read_story(story_path: Path) -> str:
+    """Full text of a story, as Path.read_text() would return it once extracted."""
+    with open_story(story_path) as f:
+        return f.read()
+
+
+def story_size(story_path: Path) -> int:
+    """Size of a story in bytes; raises FileNotFoundError if it is neither on disk nor archived."""
+    try:
+        return story_path.stat().st_size
+    except FileNotFoundError:
+        archived = archived_story(story_path)
+        if archived is None:
+            raise
+    return archived[1].file_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the corpus stories readable from the corpus zips")
+    parser.add_argument("directory", nargs="?", help="List this directory's stories")
+
+    args = parser.parse_args()
+
+    archive = get_archive(SCRIPT_DIR)
+    if archive is None:
+        print(f"No {CORPUS_ZIP} or nested corpus zips in {SCRIPT_DIR}")
+        return
+
+    if args.directory:
+        for name, info in archive.stories(args.directory).items():
+            print(f"{info.file_size:>9}  {name}")
+    else:
+        for dir_name in archive.directories():
+            print(f"{len(archive.stories(dir_name)):>6}  {dir_name}  [{archive.source(dir_name)}]")
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,10 @@ Interactive mode (default):
 Command-line mode:
     python3 download_corpus.py --download --extract-l1 --extract-l2-all
     python3 download_corpus.py --extract-l2 "0 Claude 500.zip"
+
+Extracting is optional: process_stories.py and extract_metadata.py read
+stories straight from the zips (see corpus_archive.py) for any corpus
+directory that has not been extracted.
 """
 
 import argparse
@@ -221,6 +225,9 @@ Examples:
   python3 download_corpus.py --extract-l1       # Extract outer zip
   python3 download_corpus.py --extract-l2-all   # Extract all nested zips
   python3 download_corpus.py -y --download --extract-l1 --extract-l2-all
+
+Extraction is optional: the processing scripts can read stories straight
+from the downloaded zip.
         """,
     )
 
@@ -1,68 +1,309 @@
 #!/usr/bin/env python3
-"""Extract metadata (Title, Author, Genre) from markdown files."""
+"""
+Extract metadata (Title, Author, Genre) from markdown files.
 
+Only the corpus directories (CORPUS_DIRECTORIES in process_stories.py) are
+searched for stories; reports and the rest of the repo are never walked.
+Directories that were never extracted are read from the corpus zip.
+The three fields sit in the first few lines of each story, so only a
+bounded header prefix is read: the file is read in blocks until all three
+have been found, or --header-chars characters have been read. Files are spread
+across -w worker processes.
+
+Each story's fields are cached in .cache/metadata.sqlite with the file's
+size, mtime and inode, so a re-run only reads new or modified stories and
+drops deleted ones. Use --full to re-read everything.
+"""
+
+import argparse
+import calendar
 import json
+import os
 import re
+import sqlite3
 import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from corpus_archive import get_archive, open_story
+from process_stories import CORPUS_DIRECTORIES
+
+SCRIPT_DIR = Path(__file__).parent
+CACHE_FILE = SCRIPT_DIR / '.cache' / 'metadata.sqlite'
+
+# Bump when fields are extracted differently, so cached fields are re-read
+CACHE_VERSION = 2
+
+# Characters read per block while looking for the header fields
+READ_SIZE = 4096
+
+# Stop looking for missing fields after this many characters (0: read whole files)
+DEFAULT_HEADER_CHARS = 16384
+
+FIELD_PATTERNS = [
+    ('title', re.compile(r'^#\s+(.+)$', re.MULTILINE)),  # first H1 heading
+    ('author', re.compile(r'\*\*Author:\*\*\s*(.+)$', re.MULTILINE)),
+    ('genre', re.compile(r'\*\*Genre:\*\*\s*(.+)$', re.MULTILINE)),
+]
+
+
+def find_stories(root: Path) -> list[tuple[Path, os.DirEntry | zipfile.ZipInfo]]:
+    """
+    (path, DirEntry) of each story file under root's corpus directories, in
+    path order. Each directory is listed once with os.scandir; hidden
+    directories and README files are skipped. Corpus directories that are
+    not on disk are listed from the corpus zip, as (path, ZipInfo), with
+    the path each story would have once extracted.
+    """
+    stories = []
+    pending = [root / name for name in CORPUS_DIRECTORIES if (root / name).is_dir()]
+    archive = get_archive(root) if len(pending) < len(CORPUS_DIRECTORIES) else None
+    if archive:
+        for name in CORPUS_DIRECTORIES:
+            if not (root / name).is_dir():
+                stories.extend(
+                    (root / name / story, info) for story, info in archive.stories(name).items()
+                    if story.lower() != 'readme.md'
+                )
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith('.'):
+                        pending.append(Path(entry.path))
+                elif entry.name.endswith('.md') and entry.name.lower() != 'readme.md':
+                    stories.append((Path(entry.path), entry))
+    stories.sort(key=lambda story: story[0].parts)
+    return stories
+
+
+def file_fingerprint(entry: os.DirEntry | zipfile.ZipInfo) -> tuple[int, int, int]:
+    """
+    (size, mtime_ns, inode) of a story file; any change means it must be
+    re-read. For a story in the corpus zip, its CRC-32 stands in for the inode.
+    """
+    if isinstance(entry, zipfile.ZipInfo):
+        return entry.file_size, calendar.timegm(entry.date_time) * 10**9, entry.CRC
+    stat = entry.stat()
+    return stat.st_size, stat.st_mtime_ns, entry.inode()
+
+
+class MetadataCache:
+    """
+    SQLite record of each story's extracted fields and the fingerprint of
+    the file they were read from. The header limit they were read with is
+    stored alongside, and changing it clears the cache.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        if self.get_meta('version') != CACHE_VERSION:
+            self._conn.execute('DROP TABLE IF EXISTS stories')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS stories (
+                file TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                title TEXT,
+                author TEXT,
+                genre TEXT
+            )
+        """)
+        if self.get_meta('version') != CACHE_VERSION:
+            self.clear()
+
+    def get_meta(self, key: str):
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_meta(self, key: str, value):
+        self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, json.dumps(value)))
+
+    def clear(self):
+        self._conn.execute('DELETE FROM stories')
+        self._conn.execute('DELETE FROM meta')
+        self.set_meta('version', CACHE_VERSION)
+        self._conn.commit()
+
+    def fingerprints(self) -> dict[str, tuple]:
+        """file -> (size, mtime_ns, inode)"""
+        rows = self._conn.execute('SELECT file, size, mtime_ns, inode FROM stories')
+        return {row[0]: row[1:] for row in rows}
+
+    def put(self, metadata: dict, fingerprint: tuple):
+        self._conn.execute(
+            'INSERT OR REPLACE INTO stories (file, size, mtime_ns, inode, title, author, genre) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (metadata['file'], *fingerprint, metadata['title'], metadata['author'], metadata['genre'])
+        )
+
+    def delete(self, file: str):
+        self._conn.execute('DELETE FROM stories WHERE file = ?', (file,))
+
+    def all(self) -> list[dict]:
+        """Every story's metadata, in path order, as written to metadata.json."""
+        rows = self._conn.execute('SELECT file, title, author, genre FROM stories').fetchall()
+        rows.sort(key=lambda row: Path(row[0]).parts)
+        return [{'file': file, 'title': title, 'author': author, 'genre': genre}
+                for file, title, author, genre in rows]
+
+    def commit(self):
+        self._conn.commit()
 
-def extract_metadata(file_path: Path, root: Path) -> dict | None:
-    """Extract title, author, and genre from a markdown file."""
+    def close(self):
+        self._conn.close()
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    """
+    Atomically replace path with text unless it already holds exactly that;
+    returns whether it was written. Leaving an unchanged metadata.json alone
+    keeps its mtime, which aggregate_analysis.py watches.
+    """
     try:
-        content = file_path.read_text(encoding='utf-8')
-    except Exception as e:
-        print(f"Error reading {file_path}: {e}", file=sys.stderr)
-        return None
+        if path.read_text(encoding='utf-8') == text:
+            return False
+    except FileNotFoundError:
+        pass
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(text, encoding='utf-8')
+    os.replace(tmp_path, path)
+    return True
+
 
+def extract_metadata(file_path: Path, root: Path, header_chars: int = DEFAULT_HEADER_CHARS) -> dict | None:
+    """Extract title, author, and genre from the header of a markdown file."""
     metadata = {
         'file': str(file_path.relative_to(root)),
         'title': None,
         'author': None,
         'genre': None,
     }
+    missing = list(FIELD_PATTERNS)
 
-    # Extract title (first H1 heading)
-    title_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
-    if title_match:
-        metadata['title'] = title_match.group(1).strip()
+    try:
+        with open_story(file_path) as f:
+            text = ''
+            searched = 0
+            while missing:
+                chunk = f.read(READ_SIZE)
+                text += chunk
+                # Only search complete lines, so a value cut off mid-block isn't taken
+                end = len(text) if not chunk else text.rfind('\n', searched) + 1
+                if end > searched:
+                    for field, pattern in list(missing):
+                        match = pattern.search(text, searched, end)
+                        if match:
+                            metadata[field] = match.group(1).strip()
+                            missing.remove((field, pattern))
+                    # Search the last non-blank line again with the next block, so a
+                    # field whose value is on a following line is still found
+                    last = searched + len(text[searched:end].rstrip())
+                    searched = max(searched, text.rfind('\n', searched, last) + 1) if chunk else end
+                if not chunk or (header_chars and len(text) >= header_chars):
+                    break
+    except Exception as e:
+        print(f"Error reading {file_path}: {e}", file=sys.stderr)
+        return None
 
-    # Extract author
-    author_match = re.search(r'\*\*Author:\*\*\s*(.+)$', content, re.MULTILINE)
-    if author_match:
-        metadata['author'] = author_match.group(1).strip()
+    return metadata
 
-    # Extract genre
-    genre_match = re.search(r'\*\*Genre:\*\*\s*(.+)$', content, re.MULTILINE)
-    if genre_match:
-        metadata['genre'] = genre_match.group(1).strip()
 
-    return metadata
+def _extract_task(task: tuple) -> dict | None:
+    return extract_metadata(*task)
+
+
+def extract_all(md_files: list[Path], root: Path, header_chars: int, workers: int = 1) -> list[dict | None]:
+    """
+    Extract metadata from each file, in a process pool when workers > 1.
+    Results are in file order, with None for files that could not be read.
+    """
+    tasks = [(file_path, root, header_chars) for file_path in md_files]
+    if workers <= 1 or len(tasks) < 2:
+        return [_extract_task(task) for task in tasks]
+
+    chunksize = max(1, min(256, len(tasks) // (workers * 8)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_extract_task, tasks, chunksize=chunksize))
 
 
 def main():
-    # Find all markdown files in subdirectories
-    root = Path(__file__).parent
-    md_files = sorted(root.glob('**/*.md'))
+    parser = argparse.ArgumentParser(description="Extract story metadata into metadata.json")
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=1,
+        help="Processes used to read story headers (default: 1)"
+    )
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help="Ignore the cache and re-read every story"
+    )
+    parser.add_argument(
+        '--header-chars',
+        type=int,
+        default=DEFAULT_HEADER_CHARS,
+        help=f"Characters to read looking for missing fields; 0 reads whole files (default: {DEFAULT_HEADER_CHARS})"
+    )
+
+    args = parser.parse_args()
 
-    # Exclude README files
-    md_files = [f for f in md_files if f.name.lower() != 'readme.md']
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
 
-    print(f"Found {len(md_files)} markdown files")
+    root = SCRIPT_DIR
+    stories = find_stories(root)
 
-    results = []
-    for file_path in md_files:
-        metadata = extract_metadata(file_path, root)
+    print(f"Found {len(stories)} stories in {len(CORPUS_DIRECTORIES)} corpus directories")
+
+    cache = MetadataCache(CACHE_FILE)
+    if args.full or cache.get_meta('header_chars') != args.header_chars:
+        cache.clear()
+        cache.set_meta('header_chars', args.header_chars)
+
+    # Only stories that are new or whose fingerprint changed are read
+    known = cache.fingerprints()
+    changed = []
+    for file_path, entry in stories:
+        fingerprint = file_fingerprint(entry)
+        if known.pop(str(file_path.relative_to(root)), None) != fingerprint:
+            changed.append((file_path, fingerprint))
+
+    results = extract_all([file_path for file_path, _ in changed], root, args.header_chars, args.workers)
+    extracted = unreadable = 0
+    for (file_path, fingerprint), metadata in zip(changed, results):
         if metadata:
-            results.append(metadata)
+            cache.put(metadata, fingerprint)
+            extracted += 1
+        else:
+            # Don't keep fields read from an earlier version of a story that is now unreadable
+            cache.delete(str(file_path.relative_to(root)))
+            unreadable += 1
+
+    # Anything left in the cache no longer has a story
+    for file in known:
+        cache.delete(file)
+    cache.commit()
+
+    print(f"  {len(stories) - len(changed)} unchanged, {extracted} extracted, {unreadable} unreadable, {len(known)} removed")
 
     # Write to JSON
     output_path = root / 'metadata.json'
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    results = cache.all()
+    cache.close()
+    written = write_if_changed(output_path, json.dumps(results, indent=2, ensure_ascii=False))
 
-    print(f"Extracted metadata from {len(results)} files")
-    print(f"Output written to {output_path}")
+    print(f"Metadata for {len(results)} stories")
+    print(f"Output {'written to' if written else 'unchanged in'} {output_path}")
 
 
 if __name__ == '__main__':
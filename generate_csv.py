@@ -6,10 +6,15 @@ This script creates multiple CSV files categorizing stories by their
 AI behavior patterns and project assessment outcomes.
 """
 
+import argparse
 import csv
+import io
 import json
+import os
 from pathlib import Path
 
+from metadata_store import MetadataStore
+
 SCRIPT_DIR = Path(__file__).parent
 ANALYSIS_FILE = SCRIPT_DIR / "analysis.json"
 CSV_DIR = SCRIPT_DIR / "csv"
@@ -26,6 +31,15 @@ def load_analysis():
         return json.load(f)
 
 
+def load_authors() -> dict:
+    """Map each story file to its author, from the metadata store."""
+    store = MetadataStore()
+    try:
+        return {story["file"]: story["author"] for story in store.select()}
+    finally:
+        store.close()
+
+
 def get_directory_and_filename(file_path: str) -> tuple[str, str]:
     """Split file path into directory and filename."""
     parts = file_path.split("/", 1)
@@ -34,6 +48,12 @@ def get_directory_and_filename(file_path: str) -> tuple[str, str]:
     return "", file_path
 
 
+def get_model_from_directory(directory: str) -> str:
+    """Get the generating model from a corpus directory name, e.g. "2 Claude 500 1of6" -> "Claude"."""
+    parts = directory.split()
+    return parts[1] if len(parts) > 1 else "Unknown"
+
+
 def get_success_status(story: dict) -> str:
     """Get the success/failure status from project assessment."""
     return story.get("project_assessment", {}).get("success_level", "Unknown")
@@ -44,229 +64,209 @@ def is_success(story: dict) -> bool:
     return get_success_status(story).lower() == "success"
 
 
-def count_behaviors_27_categories(story: dict) -> dict:
-    """Count behaviors in all 27 benevolence × alignment × portrayal categories."""
-    counts = {}
-    for ben in BENEVOLENCE_VALUES:
-        for align in ALIGNMENT_VALUES:
-            for port in PORTRAYAL_VALUES:
-                key = f"{ben.lower()}_{align.lower()}_{port.lower()}"
-                counts[key] = 0
-
+def level_index(values: list) -> dict:
+    """Map each lowercased value to its position in values."""
+    return {value.lower(): i for i, value in enumerate(values)}
+
+
+BENEVOLENCE_INDEX = level_index(BENEVOLENCE_VALUES)
+ALIGNMENT_INDEX = level_index(ALIGNMENT_VALUES)
+PORTRAYAL_INDEX = level_index(PORTRAYAL_VALUES)
+
+# Each behavior is encoded once as a category code. Every dimension has its
+# three levels plus OTHER for a missing or unrecognised value, so behaviors
+# with one bad field still count toward filters on the other two.
+OTHER = 3
+LEVELS = 4
+CODE_COUNT = LEVELS ** 3
+
+
+def category_code(ben: int, align: int, port: int) -> int:
+    return (ben * LEVELS + align) * LEVELS + port
+
+
+def behavior_code(behavior: dict) -> int:
+    """Category code of one behavior."""
+    return category_code(
+        BENEVOLENCE_INDEX.get(str(behavior.get("benevolence") or "").lower(), OTHER),
+        ALIGNMENT_INDEX.get(str(behavior.get("alignment") or "").lower(), OTHER),
+        PORTRAYAL_INDEX.get(str(behavior.get("portrayal") or "").lower(), OTHER),
+    )
+
+
+def category_mask(benevolence: list = None, alignment: list = None, portrayal: list = None) -> int:
+    """Bitmask of the category codes matching the given criteria; None matches any level."""
+    def levels(values, index):
+        return range(LEVELS) if values is None else [index[value.lower()] for value in values]
+
+    mask = 0
+    for ben in levels(benevolence, BENEVOLENCE_INDEX):
+        for align in levels(alignment, ALIGNMENT_INDEX):
+            for port in levels(portrayal, PORTRAYAL_INDEX):
+                mask |= 1 << category_code(ben, align, port)
+    return mask
+
+
+# The 27 benevolence × alignment × portrayal columns and the codes behind them
+CATEGORY_27 = [
+    (f"{ben.lower()}_{align.lower()}_{port.lower()}", category_code(b, a, p))
+    for b, ben in enumerate(BENEVOLENCE_VALUES)
+    for a, align in enumerate(ALIGNMENT_VALUES)
+    for p, port in enumerate(PORTRAYAL_VALUES)
+]
+
+# The 9 benevolence × alignment columns, each summed over every portrayal
+CATEGORY_9 = [
+    (f"{ben.lower()}_{align.lower()}", [category_code(b, a, p) for p in range(LEVELS)])
+    for b, ben in enumerate(BENEVOLENCE_VALUES)
+    for a, align in enumerate(ALIGNMENT_VALUES)
+]
+
+# Filtering levels 2-4: (flag, mask, flag, mask, pass). A story gets a flag if
+# it has a behavior in that flag's categories, and passes if it has neither.
+FILTER_LEVELS = [
+    ("level2_misaligned_positive", category_mask(alignment=["Misaligned"], portrayal=["Positive"]),
+     "level2_malevolent_positive", category_mask(benevolence=["Malevolent"], portrayal=["Positive"]),
+     "level2_pass"),
+    ("level3_misaligned", category_mask(alignment=["Misaligned"]),
+     "level3_malevolent", category_mask(benevolence=["Malevolent"]),
+     "level3_pass"),
+    ("level4_alignment_issues", category_mask(alignment=["Misaligned", "Ambiguous"]),
+     "level4_benevolence_issues", category_mask(benevolence=["Malevolent", "Ambiguous"]),
+     "level4_pass"),
+]
+
+# Per-story 0/1 stats; summed over any set of stories they give its filtering stats.
+# Every name after "total" is also a filtering list, written to <name>.csv.
+STAT_COLUMNS = ["total", "level1_success", "level1_failure"] + [
+    name for first, _, second, _, passing in FILTER_LEVELS for name in (first, second, passing)
+]
+
+
+# Every file generate_csv_files() writes to CSV_DIR
+CSV_OUTPUTS = [
+    "stories_27_categories.csv", "stories_9_categories.csv", "stories_simple.csv",
+] + [f"{name}.csv" for name in STAT_COLUMNS[1:]] + [
+    "summary.csv", "summary_by_group.csv", "summary_by_group.md", "README.md",
+]
+
+
+def encode_story(story: dict) -> dict:
+    """
+    Encode one story in a single pass over its behaviors: counts per category
+    code, its 0/1 value for each of STAT_COLUMNS, and its value for each of
+    GROUP_DIMENSIONS except author, which comes from the metadata store and is
+    filled in by generate_csv_files() when needed. Records are plain JSON
+    values, so aggregate_analysis.py can store them in its manifest.
+    """
+    counts = [0] * CODE_COUNT
+    present = 0
     for behavior in story.get("behaviors", []):
-        ben = behavior.get("benevolence", "").lower()
-        align = behavior.get("alignment", "").lower()
-        port = behavior.get("portrayal", "").lower()
-        key = f"{ben}_{align}_{port}"
-        if key in counts:
-            counts[key] += 1
-
-    return counts
-
-
-def count_behaviors_9_categories(story: dict) -> dict:
-    """Count behaviors in the 9 benevolence × alignment categories."""
-    counts = {}
-    for ben in BENEVOLENCE_VALUES:
-        for align in ALIGNMENT_VALUES:
-            key = f"{ben.lower()}_{align.lower()}"
-            counts[key] = 0
+        code = behavior_code(behavior)
+        counts[code] += 1
+        present |= 1 << code
+
+    success = is_success(story)
+    stats = [1, int(success), int(not success)]
+    for _, first_mask, _, second_mask, _ in FILTER_LEVELS:
+        first = bool(present & first_mask)
+        second = bool(present & second_mask)
+        stats += [int(first), int(second), int(not (first or second))]
+
+    directory, filename = get_directory_and_filename(story["file"])
+    return {
+        "file": story["file"],
+        "directory": directory,
+        "filename": filename,
+        "genre": story.get("genre", "Unknown"),
+        "batch": story.get("batch", -1),
+        "status": get_success_status(story),
+        "model": get_model_from_directory(directory),
+        "counts": counts,
+        "stats": stats,
+    }
 
-    for behavior in story.get("behaviors", []):
-        ben = behavior.get("benevolence", "").lower()
-        align = behavior.get("alignment", "").lower()
-        key = f"{ben}_{align}"
-        if key in counts:
-            counts[key] += 1
 
-    return counts
+def write_if_changed(path: Path, text: str, newline: str | None = None) -> bool:
+    """
+    Write text to path unless it already holds exactly that; returns whether
+    it was written. Unchanged outputs keep their mtime, so git and static-site
+    deploys only see the files whose content moved. newline is as for open().
+    """
+    try:
+        with open(path, "r", encoding="utf-8", newline=newline) as f:
+            if f.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8", newline=newline) as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return True
 
 
-def has_behavior_matching(story: dict, benevolence: list = None, alignment: list = None, portrayal: list = None) -> bool:
-    """Check if story has at least one behavior matching the given criteria."""
-    for behavior in story.get("behaviors", []):
-        ben_match = benevolence is None or behavior.get("benevolence", "") in benevolence
-        align_match = alignment is None or behavior.get("alignment", "") in alignment
-        port_match = portrayal is None or behavior.get("portrayal", "") in portrayal
-        if ben_match and align_match and port_match:
-            return True
-    return False
+def report_write(path: Path, written: bool, detail: str = ""):
+    print(f"  {'Written' if written else 'Unchanged'}: {path.name}{detail}")
 
 
 def write_csv(filepath: Path, rows: list, headers: list):
-    """Write rows to a CSV file."""
-    with open(filepath, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
-        writer.writerows(rows)
-    print(f"  Written: {filepath.name} ({len(rows)} rows)")
+    """Write rows to a CSV file, if they differ from what it holds."""
+    buffer = io.StringIO(newline="")
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    writer.writerows(rows)
+    report_write(filepath, write_if_changed(filepath, buffer.getvalue(), newline=""), f" ({len(rows)} rows)")
 
 
-def generate_full_27_category_csv(stories: list):
+def generate_full_27_category_csv(records: list):
     """Generate CSV with all 27 behavior categories."""
-    headers = ["directory", "filename", "genre", "status"]
-
-    # Add 27 category headers
-    for ben in BENEVOLENCE_VALUES:
-        for align in ALIGNMENT_VALUES:
-            for port in PORTRAYAL_VALUES:
-                headers.append(f"{ben.lower()}_{align.lower()}_{port.lower()}")
+    headers = ["directory", "filename", "genre", "status"] + [key for key, _ in CATEGORY_27]
 
     rows = []
-    for story in stories:
-        directory, filename = get_directory_and_filename(story["file"])
-        status = get_success_status(story)
-        genre = story.get("genre", "Unknown")
-        counts = count_behaviors_27_categories(story)
-
-        row = [directory, filename, genre, status]
-        for ben in BENEVOLENCE_VALUES:
-            for align in ALIGNMENT_VALUES:
-                for port in PORTRAYAL_VALUES:
-                    key = f"{ben.lower()}_{align.lower()}_{port.lower()}"
-                    row.append(counts[key])
+    for record in records:
+        counts = record["counts"]
+        row = [record["directory"], record["filename"], record["genre"], record["status"]]
+        row += [counts[code] for _, code in CATEGORY_27]
         rows.append(row)
 
     write_csv(CSV_DIR / "stories_27_categories.csv", rows, headers)
 
 
-def generate_9_category_csv(stories: list):
+def generate_9_category_csv(records: list):
     """Generate CSV with 9 benevolence × alignment categories."""
-    headers = ["directory", "filename", "status"]
-
-    # Add 9 category headers
-    for ben in BENEVOLENCE_VALUES:
-        for align in ALIGNMENT_VALUES:
-            headers.append(f"{ben.lower()}_{align.lower()}")
+    headers = ["directory", "filename", "status"] + [key for key, _ in CATEGORY_9]
 
     rows = []
-    for story in stories:
-        directory, filename = get_directory_and_filename(story["file"])
-        status = get_success_status(story)
-        counts = count_behaviors_9_categories(story)
-
-        row = [directory, filename, status]
-        for ben in BENEVOLENCE_VALUES:
-            for align in ALIGNMENT_VALUES:
-                key = f"{ben.lower()}_{align.lower()}"
-                row.append(counts[key])
+    for record in records:
+        counts = record["counts"]
+        row = [record["directory"], record["filename"], record["status"]]
+        row += [sum(counts[code] for code in codes) for _, codes in CATEGORY_9]
         rows.append(row)
 
     write_csv(CSV_DIR / "stories_9_categories.csv", rows, headers)
 
 
-def generate_simple_csv(stories: list):
+def generate_simple_csv(records: list):
     """Generate simple CSV with just directory, filename, and status."""
     headers = ["directory", "filename", "status"]
-
-    rows = []
-    for story in stories:
-        directory, filename = get_directory_and_filename(story["file"])
-        status = get_success_status(story)
-        rows.append([directory, filename, status])
-
+    rows = [[record["directory"], record["filename"], record["status"]] for record in records]
     write_csv(CSV_DIR / "stories_simple.csv", rows, headers)
 
 
-def generate_level1_lists(stories: list) -> dict:
-    """Generate Level 1 filtering: success vs failure."""
-    successes = []
-    failures = []
-
-    for story in stories:
-        if is_success(story):
-            successes.append([story["file"]])
-        else:
-            failures.append([story["file"]])
-
-    write_csv(CSV_DIR / "level1_success.csv", successes, ["file"])
-    write_csv(CSV_DIR / "level1_failure.csv", failures, ["file"])
-
-    return {"level1_success": len(successes), "level1_failure": len(failures)}
-
-
-def generate_level2_lists(stories: list) -> dict:
-    """Generate Level 2 filtering: misaligned/malevolent portrayed positively."""
-    misaligned_positive = []
-    malevolent_positive = []
-    passing = []
-
-    for story in stories:
-        has_misaligned = has_behavior_matching(story, alignment=["Misaligned"], portrayal=["Positive"])
-        has_malevolent = has_behavior_matching(story, benevolence=["Malevolent"], portrayal=["Positive"])
-
-        if has_misaligned:
-            misaligned_positive.append([story["file"]])
-        if has_malevolent:
-            malevolent_positive.append([story["file"]])
-        if not has_misaligned and not has_malevolent:
-            passing.append([story["file"]])
-
-    write_csv(CSV_DIR / "level2_misaligned_positive.csv", misaligned_positive, ["file"])
-    write_csv(CSV_DIR / "level2_malevolent_positive.csv", malevolent_positive, ["file"])
-    write_csv(CSV_DIR / "level2_pass.csv", passing, ["file"])
-
-    return {
-        "level2_misaligned_positive": len(misaligned_positive),
-        "level2_malevolent_positive": len(malevolent_positive),
-        "level2_pass": len(passing),
-    }
-
-
-def generate_level3_lists(stories: list) -> dict:
-    """Generate Level 3 filtering: misaligned/malevolent with any portrayal."""
-    misaligned = []
-    malevolent = []
-    passing = []
-
-    for story in stories:
-        has_misaligned = has_behavior_matching(story, alignment=["Misaligned"])
-        has_malevolent = has_behavior_matching(story, benevolence=["Malevolent"])
-
-        if has_misaligned:
-            misaligned.append([story["file"]])
-        if has_malevolent:
-            malevolent.append([story["file"]])
-        if not has_misaligned and not has_malevolent:
-            passing.append([story["file"]])
-
-    write_csv(CSV_DIR / "level3_misaligned.csv", misaligned, ["file"])
-    write_csv(CSV_DIR / "level3_malevolent.csv", malevolent, ["file"])
-    write_csv(CSV_DIR / "level3_pass.csv", passing, ["file"])
-
-    return {
-        "level3_misaligned": len(misaligned),
-        "level3_malevolent": len(malevolent),
-        "level3_pass": len(passing),
-    }
-
-
-def generate_level4_lists(stories: list) -> dict:
-    """Generate Level 4 filtering: misaligned/ambiguous alignment OR malevolent/ambiguous benevolence."""
-    misaligned_or_ambiguous = []
-    malevolent_or_ambiguous = []
-    passing = []
-
-    for story in stories:
-        has_align_issue = has_behavior_matching(story, alignment=["Misaligned", "Ambiguous"])
-        has_ben_issue = has_behavior_matching(story, benevolence=["Malevolent", "Ambiguous"])
-
-        if has_align_issue:
-            misaligned_or_ambiguous.append([story["file"]])
-        if has_ben_issue:
-            malevolent_or_ambiguous.append([story["file"]])
-        if not has_align_issue and not has_ben_issue:
-            passing.append([story["file"]])
-
-    write_csv(CSV_DIR / "level4_alignment_issues.csv", misaligned_or_ambiguous, ["file"])
-    write_csv(CSV_DIR / "level4_benevolence_issues.csv", malevolent_or_ambiguous, ["file"])
-    write_csv(CSV_DIR / "level4_pass.csv", passing, ["file"])
-
-    return {
-        "level4_alignment_issues": len(misaligned_or_ambiguous),
-        "level4_benevolence_issues": len(malevolent_or_ambiguous),
-        "level4_pass": len(passing),
-    }
+def generate_filtering_lists(records: list) -> dict:
+    """
+    Generate the Level 1-4 filtering lists, one CSV of story files per stat
+    column after "total". Returns the number of stories in each list.
+    """
+    counts = {}
+    for column, name in enumerate(STAT_COLUMNS):
+        if name == "total":
+            continue
+        rows = [[record["file"]] for record in records if record["stats"][column]]
+        write_csv(CSV_DIR / f"{name}.csv", rows, ["file"])
+        counts[name] = len(rows)
+    return counts
 
 
 def generate_summary_csv(total_stories: int, counts: dict):
@@ -281,122 +281,58 @@ def generate_summary_csv(total_stories: int, counts: dict):
     write_csv(CSV_DIR / "summary.csv", rows, headers)
 
 
-def compute_filtering_stats(stories: list) -> dict:
-    """Compute all filtering level stats for a list of stories."""
-    total = len(stories)
-    if total == 0:
-        return {
-            "total": 0,
-            "level1_success": 0,
-            "level1_failure": 0,
-            "level2_misaligned_positive": 0,
-            "level2_malevolent_positive": 0,
-            "level2_pass": 0,
-            "level3_misaligned": 0,
-            "level3_malevolent": 0,
-            "level3_pass": 0,
-            "level4_alignment_issues": 0,
-            "level4_benevolence_issues": 0,
-            "level4_pass": 0,
-        }
-
-    stats = {"total": total}
-
-    # Level 1
-    stats["level1_success"] = sum(1 for s in stories if is_success(s))
-    stats["level1_failure"] = total - stats["level1_success"]
-
-    # Level 2
-    l2_misaligned = 0
-    l2_malevolent = 0
-    l2_pass = 0
-    for story in stories:
-        has_misaligned = has_behavior_matching(story, alignment=["Misaligned"], portrayal=["Positive"])
-        has_malevolent = has_behavior_matching(story, benevolence=["Malevolent"], portrayal=["Positive"])
-        if has_misaligned:
-            l2_misaligned += 1
-        if has_malevolent:
-            l2_malevolent += 1
-        if not has_misaligned and not has_malevolent:
-            l2_pass += 1
-    stats["level2_misaligned_positive"] = l2_misaligned
-    stats["level2_malevolent_positive"] = l2_malevolent
-    stats["level2_pass"] = l2_pass
-
-    # Level 3
-    l3_misaligned = 0
-    l3_malevolent = 0
-    l3_pass = 0
-    for story in stories:
-        has_misaligned = has_behavior_matching(story, alignment=["Misaligned"])
-        has_malevolent = has_behavior_matching(story, benevolence=["Malevolent"])
-        if has_misaligned:
-            l3_misaligned += 1
-        if has_malevolent:
-            l3_malevolent += 1
-        if not has_misaligned and not has_malevolent:
-            l3_pass += 1
-    stats["level3_misaligned"] = l3_misaligned
-    stats["level3_malevolent"] = l3_malevolent
-    stats["level3_pass"] = l3_pass
-
-    # Level 4
-    l4_alignment = 0
-    l4_benevolence = 0
-    l4_pass = 0
-    for story in stories:
-        has_align_issue = has_behavior_matching(story, alignment=["Misaligned", "Ambiguous"])
-        has_ben_issue = has_behavior_matching(story, benevolence=["Malevolent", "Ambiguous"])
-        if has_align_issue:
-            l4_alignment += 1
-        if has_ben_issue:
-            l4_benevolence += 1
-        if not has_align_issue and not has_ben_issue:
-            l4_pass += 1
-    stats["level4_alignment_issues"] = l4_alignment
-    stats["level4_benevolence_issues"] = l4_benevolence
-    stats["level4_pass"] = l4_pass
-
-    return stats
-
-
-def generate_breakdown_csv(stories: list):
-    """Generate CSV with stats broken down by genre and batch."""
-    # Define the stat columns
-    stat_cols = [
-        "total",
-        "level1_success", "level1_failure",
-        "level2_misaligned_positive", "level2_malevolent_positive", "level2_pass",
-        "level3_misaligned", "level3_malevolent", "level3_pass",
-        "level4_alignment_issues", "level4_benevolence_issues", "level4_pass",
-    ]
-
-    headers = ["group_type", "group_value"] + stat_cols
+def compute_filtering_stats(records: list) -> dict:
+    """Compute all filtering level stats for a list of encoded stories."""
+    totals = [sum(column) for column in zip(*(record["stats"] for record in records))]
+    return dict(zip(STAT_COLUMNS, totals or [0] * len(STAT_COLUMNS)))
+
+
+# Dimensions the breakdowns can group stories by: name -> (record key,
+# markdown column heading, markdown row label, description of its values)
+GROUP_DIMENSIONS = {
+    "genre": ("genre", "Genre", "{}", "genre name"),
+    "batch": ("batch", "Batch", "Batch {}", "batch number"),
+    "directory": ("directory", "Directory", "{}", "corpus directory"),
+    "model": ("model", "Model", "{}", "generating model"),
+    "assessment": ("status", "Assessment", "{}", "assessment outcome"),
+    "author": ("author", "Author", "{}", "author name"),
+}
+DEFAULT_GROUP_DIMENSIONS = ["genre", "batch"]
+
+
+def group_stats(records: list, dimensions: list) -> dict:
+    """
+    Filtering stats for every group of every dimension, from one sweep over
+    the records: {dimension: {value: stats}}, with values in sorted order.
+    """
+    keys = [GROUP_DIMENSIONS[dimension][0] for dimension in dimensions]
+    partitions = {dimension: {} for dimension in dimensions}
+    for record in records:
+        for dimension, key in zip(dimensions, keys):
+            partitions[dimension].setdefault(record[key], []).append(record)
 
-    rows = []
+    return {
+        dimension: {value: compute_filtering_stats(groups[value]) for value in sorted(groups)}
+        for dimension, groups in partitions.items()
+    }
 
-    # Overall stats
-    overall_stats = compute_filtering_stats(stories)
-    rows.append(["all", "all"] + [overall_stats[col] for col in stat_cols])
 
-    # By genre
-    genres = sorted(set(s.get("genre", "Unknown") for s in stories))
-    for genre in genres:
-        genre_stories = [s for s in stories if s.get("genre") == genre]
-        stats = compute_filtering_stats(genre_stories)
-        rows.append(["genre", genre] + [stats[col] for col in stat_cols])
+def generate_breakdown_csv(records: list, dimensions: list = DEFAULT_GROUP_DIMENSIONS):
+    """Generate CSV with stats broken down by each dimension (genre and batch by default)."""
+    headers = ["group_type", "group_value"] + STAT_COLUMNS
 
-    # By batch
-    batches = sorted(set(s.get("batch", -1) for s in stories))
-    for batch in batches:
-        batch_stories = [s for s in stories if s.get("batch") == batch]
-        stats = compute_filtering_stats(batch_stories)
-        rows.append(["batch", str(batch)] + [stats[col] for col in stat_cols])
+    overall = compute_filtering_stats(records)
+    groups = group_stats(records, dimensions)
+
+    rows = [["all", "all"] + [overall[col] for col in STAT_COLUMNS]]
+    for dimension, dimension_stats in groups.items():
+        for value, stats in dimension_stats.items():
+            rows.append([dimension, str(value)] + [stats[col] for col in STAT_COLUMNS])
 
     write_csv(CSV_DIR / "summary_by_group.csv", rows, headers)
 
     # Also generate markdown version
-    generate_breakdown_markdown(stories)
+    generate_breakdown_markdown(overall, groups)
 
 
 def pct(count: int, total: int) -> str:
@@ -406,108 +342,67 @@ def pct(count: int, total: int) -> str:
     return f"{count / total * 100:.1f}%"
 
 
-def generate_breakdown_markdown(stories: list):
-    """Generate a readable markdown file with stats by genre and batch."""
-    total_stories = len(stories)
-    overall = compute_filtering_stats(stories)
-
-    # Compute stats by genre
-    genres = sorted(set(s.get("genre", "Unknown") for s in stories))
-    genre_stats = {}
-    for genre in genres:
-        genre_stories = [s for s in stories if s.get("genre") == genre]
-        genre_stats[genre] = compute_filtering_stats(genre_stories)
-
-    # Compute stats by batch
-    batches = sorted(set(s.get("batch", -1) for s in stories))
-    batch_stats = {}
-    for batch in batches:
-        batch_stories = [s for s in stories if s.get("batch") == batch]
-        batch_stats[batch] = compute_filtering_stats(batch_stories)
+def breakdown_markdown_section(dimension: str, dimension_stats: dict) -> str:
+    """The "By <dimension>" section of summary_by_group.md."""
+    _, heading, label_format, _ = GROUP_DIMENSIONS[dimension]
+    rule = "-" * (len(heading) + 2)
+    labels = {value: label_format.format(value) for value in dimension_stats}
 
-    content = f"""# Corpus Statistics by Group
-
-Generated from {total_stories:,} stories.
-
-## Overall Summary
-
-| Metric | Count | Percentage |
-|--------|-------|------------|
-| Total Stories | {overall['total']:,} | 100% |
-| Level 1 Success | {overall['level1_success']:,} | {pct(overall['level1_success'], overall['total'])} |
-| Level 1 Failure | {overall['level1_failure']:,} | {pct(overall['level1_failure'], overall['total'])} |
-| Level 2 Pass | {overall['level2_pass']:,} | {pct(overall['level2_pass'], overall['total'])} |
-| Level 3 Pass | {overall['level3_pass']:,} | {pct(overall['level3_pass'], overall['total'])} |
-| Level 4 Pass | {overall['level4_pass']:,} | {pct(overall['level4_pass'], overall['total'])} |
-
-## By Genre
+    content = f"""
+## By {heading}
 
 ### Success Rates
 
-| Genre | Stories | Success | Failure | Success Rate |
-|-------|---------|---------|---------|--------------|
+| {heading} | Stories | Success | Failure | Success Rate |
+|{rule}|---------|---------|---------|--------------|
 """
 
-    for genre in genres:
-        s = genre_stats[genre]
-        content += f"| {genre} | {s['total']:,} | {s['level1_success']:,} | {s['level1_failure']:,} | {pct(s['level1_success'], s['total'])} |\n"
+    for value, s in dimension_stats.items():
+        content += f"| {labels[value]} | {s['total']:,} | {s['level1_success']:,} | {s['level1_failure']:,} | {pct(s['level1_success'], s['total'])} |\n"
 
-    content += """
+    content += f"""
 ### Filtering Levels (Pass Rates)
 
-| Genre | Stories | Level 2 Pass | Level 3 Pass | Level 4 Pass |
-|-------|---------|--------------|--------------|--------------|
+| {heading} | Stories | Level 2 Pass | Level 3 Pass | Level 4 Pass |
+|{rule}|---------|--------------|--------------|--------------|
 """
 
-    for genre in genres:
-        s = genre_stats[genre]
-        content += f"| {genre} | {s['total']:,} | {pct(s['level2_pass'], s['total'])} | {pct(s['level3_pass'], s['total'])} | {pct(s['level4_pass'], s['total'])} |\n"
+    for value, s in dimension_stats.items():
+        content += f"| {labels[value]} | {s['total']:,} | {pct(s['level2_pass'], s['total'])} | {pct(s['level3_pass'], s['total'])} | {pct(s['level4_pass'], s['total'])} |\n"
 
-    content += """
+    content += f"""
 ### Detailed Counts
 
-| Genre | L2 Misaligned+ | L2 Malevolent+ | L3 Misaligned | L3 Malevolent | L4 Alignment | L4 Benevolence |
-|-------|----------------|----------------|---------------|---------------|--------------|----------------|
+| {heading} | L2 Misaligned+ | L2 Malevolent+ | L3 Misaligned | L3 Malevolent | L4 Alignment | L4 Benevolence |
+|{rule}|----------------|----------------|---------------|---------------|--------------|----------------|
 """
 
-    for genre in genres:
-        s = genre_stats[genre]
-        content += f"| {genre} | {s['level2_misaligned_positive']} | {s['level2_malevolent_positive']} | {s['level3_misaligned']} | {s['level3_malevolent']} | {s['level4_alignment_issues']} | {s['level4_benevolence_issues']} |\n"
-
-    content += """
-## By Batch
-
-### Success Rates
+    for value, s in dimension_stats.items():
+        content += f"| {labels[value]} | {s['level2_misaligned_positive']} | {s['level2_malevolent_positive']} | {s['level3_misaligned']} | {s['level3_malevolent']} | {s['level4_alignment_issues']} | {s['level4_benevolence_issues']} |\n"
 
-| Batch | Stories | Success | Failure | Success Rate |
-|-------|---------|---------|---------|--------------|
-"""
+    return content
 
-    for batch in batches:
-        s = batch_stats[batch]
-        content += f"| Batch {batch} | {s['total']:,} | {s['level1_success']:,} | {s['level1_failure']:,} | {pct(s['level1_success'], s['total'])} |\n"
 
-    content += """
-### Filtering Levels (Pass Rates)
-
-| Batch | Stories | Level 2 Pass | Level 3 Pass | Level 4 Pass |
-|-------|---------|--------------|--------------|--------------|
-"""
+def generate_breakdown_markdown(overall: dict, groups: dict):
+    """Generate a readable markdown file from the overall and per-group stats."""
+    content = f"""# Corpus Statistics by Group
 
-    for batch in batches:
-        s = batch_stats[batch]
-        content += f"| Batch {batch} | {s['total']:,} | {pct(s['level2_pass'], s['total'])} | {pct(s['level3_pass'], s['total'])} | {pct(s['level4_pass'], s['total'])} |\n"
+Generated from {overall['total']:,} stories.
 
-    content += """
-### Detailed Counts
+## Overall Summary
 
-| Batch | L2 Misaligned+ | L2 Malevolent+ | L3 Misaligned | L3 Malevolent | L4 Alignment | L4 Benevolence |
-|-------|----------------|----------------|---------------|---------------|--------------|----------------|
+| Metric | Count | Percentage |
+|--------|-------|------------|
+| Total Stories | {overall['total']:,} | 100% |
+| Level 1 Success | {overall['level1_success']:,} | {pct(overall['level1_success'], overall['total'])} |
+| Level 1 Failure | {overall['level1_failure']:,} | {pct(overall['level1_failure'], overall['total'])} |
+| Level 2 Pass | {overall['level2_pass']:,} | {pct(overall['level2_pass'], overall['total'])} |
+| Level 3 Pass | {overall['level3_pass']:,} | {pct(overall['level3_pass'], overall['total'])} |
+| Level 4 Pass | {overall['level4_pass']:,} | {pct(overall['level4_pass'], overall['total'])} |
 """
 
-    for batch in batches:
-        s = batch_stats[batch]
-        content += f"| Batch {batch} | {s['level2_misaligned_positive']} | {s['level2_malevolent_positive']} | {s['level3_misaligned']} | {s['level3_malevolent']} | {s['level4_alignment_issues']} | {s['level4_benevolence_issues']} |\n"
+    for dimension, dimension_stats in groups.items():
+        content += breakdown_markdown_section(dimension, dimension_stats)
 
     content += """
 ## Filtering Level Definitions
@@ -521,12 +416,17 @@ Higher pass rates indicate "cleaner" stories with fewer problematic AI behaviors
 """
 
     md_path = CSV_DIR / "summary_by_group.md"
-    with open(md_path, "w", encoding="utf-8") as f:
-        f.write(content)
-    print(f"  Written: {md_path.name}")
+    report_write(md_path, write_if_changed(md_path, content))
+
 
+def prose_list(items: list, conjunction: str = "and") -> str:
+    """Join items for prose: "a", "a and b", "a, b, and c"."""
+    if len(items) <= 2:
+        return f" {conjunction} ".join(items)
+    return f"{', '.join(items[:-1])}, {conjunction} {items[-1]}"
 
-def generate_readme(total_stories: int, counts: dict):
+
+def generate_readme(total_stories: int, counts: dict, dimensions: list = DEFAULT_GROUP_DIMENSIONS):
     """Generate README.md explaining all the files."""
     content = f"""# CSV Reports
 
@@ -588,7 +488,7 @@ Stories filtered by whether they contain any misaligned/ambiguously-aligned or m
 | File | Description |
 |------|-------------|
 | [summary.csv](summary.csv) | Total counts and percentages for each filtering category |
-| [summary_by_group.csv](summary_by_group.csv) | Filtering stats broken down by genre and batch |
+| [summary_by_group.csv](summary_by_group.csv) | Filtering stats broken down by {prose_list(dimensions)} |
 | [summary_by_group.md](summary_by_group.md) | Readable version of the breakdown statistics |
 
 ## Column Descriptions
@@ -620,8 +520,8 @@ Stories filtered by whether they contain any misaligned/ambiguously-aligned or m
 
 ### summary_by_group.csv
 
-- `group_type`: Type of grouping ("all", "genre", or "batch")
-- `group_value`: The specific group ("all", genre name, or batch number)
+- `group_type`: Type of grouping ({prose_list([f'"{name}"' for name in ["all"] + dimensions], "or")})
+- `group_value`: The specific group ({prose_list(['"all"'] + [GROUP_DIMENSIONS[name][3] for name in dimensions], "or")})
 - `total`: Total stories in this group
 - `level1_success`, `level1_failure`: Level 1 filtering counts
 - `level2_*`: Level 2 filtering counts (positively portrayed misaligned/malevolent)
@@ -639,45 +539,60 @@ Note: Stories can appear in multiple lists within a level (e.g., a story with bo
 """
 
     readme_path = CSV_DIR / "README.md"
-    with open(readme_path, "w", encoding="utf-8") as f:
-        f.write(content)
-    print(f"  Written: {readme_path.name}")
-
+    report_write(readme_path, write_if_changed(readme_path, content))
 
-def main():
-    print("Generating CSV reports from analysis.json...")
 
-    # Create output directory
+def generate_csv_files(records: list, dimensions: list = DEFAULT_GROUP_DIMENSIONS):
+    """Write every file in csv/ from the encoded records of all stories, in corpus order."""
     CSV_DIR.mkdir(exist_ok=True)
-    print(f"  Output directory: {CSV_DIR}")
+    total_stories = len(records)
 
-    # Load data
-    data = load_analysis()
-    stories = data.get("stories", [])
-    total_stories = len(stories)
-    print(f"  Loaded {total_stories} stories")
+    if "author" in dimensions:
+        authors = load_authors()
+        for record in records:
+            record["author"] = authors.get(record["file"]) or "Unknown"
 
     # Generate main CSV files
     print("\nGenerating data files...")
-    generate_full_27_category_csv(stories)
-    generate_9_category_csv(stories)
-    generate_simple_csv(stories)
+    generate_full_27_category_csv(records)
+    generate_9_category_csv(records)
+    generate_simple_csv(records)
 
     # Generate filtering lists
     print("\nGenerating filtering lists...")
-    counts = {}
-    counts.update(generate_level1_lists(stories))
-    counts.update(generate_level2_lists(stories))
-    counts.update(generate_level3_lists(stories))
-    counts.update(generate_level4_lists(stories))
+    counts = generate_filtering_lists(records)
 
     # Generate summary and readme
     print("\nGenerating summary and documentation...")
     generate_summary_csv(total_stories, counts)
-    generate_breakdown_csv(stories)
-    generate_readme(total_stories, counts)
+    generate_breakdown_csv(records, dimensions)
+    generate_readme(total_stories, counts, dimensions)
+
+    print(f"\nDone! {len(CSV_OUTPUTS)} files up to date in {CSV_DIR}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate CSV reports from analysis.json")
+    parser.add_argument(
+        "--group-by",
+        nargs="+",
+        default=DEFAULT_GROUP_DIMENSIONS,
+        choices=list(GROUP_DIMENSIONS),
+        help=f"Dimensions for summary_by_group.csv/.md (default: {' '.join(DEFAULT_GROUP_DIMENSIONS)})"
+    )
+
+    args = parser.parse_args()
+
+    print("Generating CSV reports from analysis.json...")
+    print(f"  Output directory: {CSV_DIR}")
+
+    # Load data
+    data = load_analysis()
+    stories = data.get("stories", [])
+    print(f"  Loaded {len(stories)} stories")
 
-    print(f"\nDone! Generated {len(list(CSV_DIR.glob('*.csv')))} CSV files and README.md in {CSV_DIR}")
+    # Encode every story once; all files are built from the encoded records
+    generate_csv_files([encode_story(story) for story in stories], args.group_by)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Indexed lookup of story metadata: title, author, genre and batch.
+
+metadata.json stays the source of truth. This keeps an indexed SQLite copy
+of it in .cache/metadata-index.sqlite, rebuilt the first time the store is
+opened after metadata.json changes. Otherwise opening it costs a stat and
+a query, and looking up one story, or the stories of a genre, author or
+batch, uses an index instead of parsing the whole of metadata.json.
+
+    python3 metadata_store.py                           # stories per genre and batch
+    python3 metadata_store.py --genre Horror            # list the Horror stories
+    python3 metadata_store.py --file "0 Claude 500/after-the-last-dive.md"
+
+    from metadata_store import MetadataStore
+    store = MetadataStore()
+    store.get("0 Claude 500/after-the-last-dive.md")
+    store.select(genre="Horror", batch=2)
+"""
+
+import argparse
+import json
+import sqlite3
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+METADATA_FILE = SCRIPT_DIR / "metadata.json"
+STORE_FILE = SCRIPT_DIR / ".cache" / "metadata-index.sqlite"
+
+# Bump when the table layout changes, so older stores are rebuilt
+STORE_VERSION = 1
+
+# Directory to batch mapping
+BATCH_MAPPING = {
+    "0 Claude 500": 0,
+    "1 Claude 500 1of4": 1,
+    "1 Claude 500 2of4": 1,
+    "1 Claude 500 3of4": 1,
+    "1 Claude 259 4of4": 1,
+    "2 Claude 500 1of6": 2,
+    "2 Claude 500 2of6": 2,
+    "2 Claude 500 3of6": 2,
+    "2 Claude 500 4of6": 2,
+    "2 Claude 500 5of6": 2,
+    "2 Claude 468 6of6": 2,
+}
+
+FIELDS = ["file", "title", "author", "genre", "batch"]
+
+
+def get_batch_from_directory(dir_name: str) -> int:
+    """Get batch number from directory name."""
+    return BATCH_MAPPING.get(dir_name, -1)
+
+
+def file_fingerprint(path: Path) -> list | None:
+    """[mtime_ns, size] of a file, or None if it does not exist."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class MetadataStore:
+    """
+    Story metadata indexed by file, genre, author and batch. Stories are
+    returned as dicts with FIELDS as keys, like the metadata.json entries
+    plus their batch.
+    """
+
+    def __init__(self, path: Path = STORE_FILE, source: Path = METADATA_FILE):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.source = source
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        if self._get_meta("version") != STORE_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS stories")
+            self._conn.execute("DELETE FROM meta")
+            self._set_meta("version", STORE_VERSION)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS stories (
+                file TEXT PRIMARY KEY,
+                title TEXT,
+                author TEXT,
+                genre TEXT,
+                batch INTEGER NOT NULL
+            )
+        """)
+        for column in ("genre", "author", "batch"):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS stories_{column} ON stories ({column}, file)")
+        self._conn.commit()
+        self._sync()
+
+    def _get_meta(self, key: str):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set_meta(self, key: str, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def _sync(self):
+        """Rebuild the table from metadata.json if it changed since the last rebuild."""
+        fingerprint = file_fingerprint(self.source)
+        if self._get_meta("source") == fingerprint:
+            return
+
+        stories = []
+        if fingerprint is not None:
+            with open(self.source, "r", encoding="utf-8") as f:
+                stories = json.load(f)
+
+        with self._conn:
+            self._conn.execute("DELETE FROM stories")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO stories (file, title, author, genre, batch) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (item["file"], item.get("title"), item.get("author"), item.get("genre"),
+                     get_batch_from_directory(item["file"].split("/", 1)[0]))
+                    for item in stories
+                ]
+            )
+            self._set_meta("source", fingerprint)
+
+    def get(self, file: str, default=None) -> dict | None:
+        """Metadata for one story file (e.g. "0 Claude 500/story.md"), or default."""
+        row = self._conn.execute(
+            f"SELECT {', '.join(FIELDS)} FROM stories WHERE file = ?", (file,)
+        ).fetchone()
+        return dict(zip(FIELDS, row)) if row else default
+
+    def select(self, genre: str | None = None, author: str | None = None, batch: int | None = None) -> list[dict]:
+        """Metadata for every story matching all of the given fields, in file order."""
+        conditions = {"genre": genre, "author": author, "batch": batch}
+        conditions = {column: value for column, value in conditions.items() if value is not None}
+        where = " AND ".join(f"{column} = ?" for column in conditions) or "1"
+        rows = self._conn.execute(
+            f"SELECT {', '.join(FIELDS)} FROM stories WHERE {where} ORDER BY file", tuple(conditions.values())
+        )
+        return [dict(zip(FIELDS, row)) for row in rows]
+
+    def files(self, genre: str | None = None, author: str | None = None, batch: int | None = None) -> list[str]:
+        """Files of every story matching all of the given fields, in file order."""
+        return [story["file"] for story in self.select(genre, author, batch)]
+
+    def counts(self, column: str) -> dict:
+        """Number of stories per value of genre, author or batch."""
+        if column not in ("genre", "author", "batch"):
+            raise ValueError(f"Cannot count by {column}")
+        rows = self._conn.execute(f"SELECT {column}, COUNT(*) FROM stories GROUP BY {column} ORDER BY {column}")
+        return dict(rows.fetchall())
+
+    def close(self):
+        self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up story metadata")
+    parser.add_argument("--file", help="Show one story's metadata")
+    parser.add_argument("--genre", help="List stories of this genre")
+    parser.add_argument("--author", help="List stories by this author")
+    parser.add_argument("--batch", type=int, help="List stories of this batch")
+
+    args = parser.parse_args()
+
+    store = MetadataStore()
+    try:
+        if args.file:
+            print(json.dumps(store.get(args.file), indent=2, ensure_ascii=False))
+        elif args.genre or args.author or args.batch is not None:
+            for file in store.files(args.genre, args.author, args.batch):
+                print(file)
+        else:
+            for column in ("genre", "batch"):
+                print(f"By {column}:")
+                counts = store.counts(column)
+                for value, count in sorted(counts.items(), key=lambda item: -item[1]):
+                    print(f"  {count:>6}  {value}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
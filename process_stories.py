@@ -7,15 +7,37 @@ using LLM APIs (Gemini or Claude) to extract AI character behaviors.
 """
 
 import argparse
+import codecs
+import hashlib
+import http.client
 import json
 import os
+import queue
+import random
 import re
+import socket
+import sqlite3
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from urllib.parse import urlsplit
 
-# Model configurations: name -> (command, model_flag)
+try:
+    import httpx  # optional: enables HTTP/2 for the API backends
+except ImportError:
+    httpx = None
+
+from corpus_archive import list_stories, read_story, story_size
+from metadata_store import MetadataStore
+
+# Model configurations: name -> (backend, model_flag)
+# Backends are listed in BACKENDS: "gemini" and "claude" run the CLI tools,
+# the "-api" backends call the HTTP APIs directly over pooled connections.
 MODELS = {
     "gemini-flash": ("gemini", "gemini-3-flash-preview"),
     "gemini": ("gemini", "gemini-3-flash-preview"),  # alias
@@ -25,11 +47,65 @@ MODELS = {
     "claude-sonnet": ("claude", "sonnet"),  # alias
     "haiku": ("claude", "haiku"),
     "claude-haiku": ("claude", "haiku"),  # alias
+    "gemini-flash-api": ("gemini-api", "gemini-3-flash-preview"),
+    "opus-api": ("anthropic-api", "claude-opus-4-1"),
+    "sonnet-api": ("anthropic-api", "claude-sonnet-4-5"),
+    "haiku-api": ("anthropic-api", "claude-haiku-4-5"),
+    "mock": ("mock", "mock"),  # synthetic local output, see MockBackend
 }
 
 DEFAULT_MODEL = "gemini-flash"
 DEFAULT_COUNT = 10
 DEFAULT_TIMEOUT = 180  # seconds
+DEFAULT_JOBS = 1
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_CACHE_FILE = ".cache/results.sqlite"
+DEFAULT_CACHE_SIZE_MB = 512
+API_MAX_OUTPUT_TOKENS = 16000
+DEFAULT_BATCH_SIZE = 8  # max stories per batched request
+BATCH_STORY_OUTPUT_TOKENS = 2000  # estimated response tokens per story in a batch
+DEFAULT_QUEUE_FILE = ".cache/queue.sqlite"
+DEFAULT_LEASE = 600  # seconds a claimed story stays reserved without a heartbeat
+DEFAULT_QUEUE_ATTEMPTS = 3  # failures before a queued story is marked failed
+DEFAULT_PROGRESS_INTERVAL = 30  # seconds between live metrics reports
+
+# Per-model rate limits: model_flag -> (requests_per_minute, tokens_per_minute)
+# Keyed by model flag so aliases in MODELS share one limiter. These are
+# conservative starting caps; the limiter backs off below them on quota errors.
+RATE_LIMITS = {
+    "gemini-3-flash-preview": (60, 1_000_000),
+    "opus": (20, 400_000),
+    "sonnet": (40, 800_000),
+    "haiku": (60, 1_000_000),
+    "claude-opus-4-1": (20, 400_000),
+    "claude-sonnet-4-5": (40, 800_000),
+    "claude-haiku-4-5": (60, 1_000_000),
+    "mock": (1_000_000, 1_000_000_000),
+}
+DEFAULT_RATE_LIMIT = (30, 500_000)
+
+# Backoff between retries of rate-limited or transient failures (seconds)
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 120.0
+
+# CLI stderr patterns that indicate a retryable failure rather than a bad response.
+# Only stderr is matched: the model's own answer may mention quotas or errors.
+RATE_LIMIT_PATTERN = re.compile(
+    r"\b429\b|RESOURCE_EXHAUSTED|rate[ _-]?limit|quota|too many requests",
+    re.IGNORECASE
+)
+TRANSIENT_ERROR_PATTERN = re.compile(
+    r"\b(?:500|502|503|504|529)\b|overloaded|UNAVAILABLE|ECONNRESET|ETIMEDOUT|"
+    r"EAI_AGAIN|socket hang up|fetch failed|network error",
+    re.IGNORECASE
+)
+RETRY_AFTER_PATTERN = re.compile(
+    r"retry(?:[ -]after|ing in| in)[:\s]*([\d.]+)\s*(ms|s|sec|seconds)?",
+    re.IGNORECASE
+)
+# HTTP statuses from the API backends that are worth retrying
+RATE_LIMIT_STATUSES = {429}
+TRANSIENT_STATUSES = {500, 502, 503, 504, 529}
 
 # Ordered list of corpus directories to process
 CORPUS_DIRECTORIES = [
@@ -76,6 +152,445 @@ Respond in this JSON format:
 }'''
 
 
+class RateLimiter:
+    """
+    Thread-safe token-bucket limiter for one model's requests and tokens per minute.
+
+    The request rate starts at the configured cap. Each rate-limit error halves
+    it and each success adds one request/minute back (AIMD), so concurrent
+    workers settle at the highest rate the quota actually sustains.
+    """
+
+    MIN_REQUESTS_PER_MINUTE = 1.0
+    # Concurrent workers usually hit the same quota window together; only the
+    # first error within this many seconds lowers the rate
+    DECREASE_COOLDOWN = 10.0
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.max_requests_per_minute = float(requests_per_minute)
+        self.requests_per_minute = float(requests_per_minute)
+        self.tokens_per_minute = float(tokens_per_minute)
+        self._lock = threading.Lock()
+        self._last_refill = time.monotonic()
+        self._request_allowance = 1.0
+        self._token_allowance = self.tokens_per_minute
+        self._blocked_until = 0.0
+        self._last_decrease = float("-inf")
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        # Allow bursts of up to ~10 seconds worth of requests
+        request_capacity = max(1.0, self.requests_per_minute / 6)
+        self._request_allowance = min(
+            request_capacity,
+            self._request_allowance + elapsed * self.requests_per_minute / 60
+        )
+        self._token_allowance = min(
+            self.tokens_per_minute,
+            self._token_allowance + elapsed * self.tokens_per_minute / 60
+        )
+
+    def acquire(self, tokens: int):
+        """Block until one request of roughly `tokens` tokens may be sent."""
+        # A single oversized request only needs a full bucket, not more
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if (now >= self._blocked_until
+                        and self._request_allowance >= 1
+                        and self._token_allowance >= tokens):
+                    self._request_allowance -= 1
+                    self._token_allowance -= tokens
+                    return
+                wait = max(
+                    self._blocked_until - now,
+                    (1 - self._request_allowance) * 60 / self.requests_per_minute,
+                    (tokens - self._token_allowance) * 60 / self.tokens_per_minute,
+                )
+            # Re-check periodically since the rate may change while waiting
+            time.sleep(min(max(wait, 0.01), 5.0))
+
+    def on_success(self):
+        """Additively raise the request rate back towards the cap."""
+        with self._lock:
+            self.requests_per_minute = min(self.max_requests_per_minute, self.requests_per_minute + 1)
+
+    def on_rate_limited(self, retry_after: float | None = None):
+        """Halve the request rate and pause all callers if the server asked us to."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.DECREASE_COOLDOWN:
+                self._last_decrease = now
+                self.requests_per_minute = max(self.MIN_REQUESTS_PER_MINUTE, self.requests_per_minute / 2)
+                self._request_allowance = min(self._request_allowance, 0.0)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+
+
+_rate_limiters: dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model_flag: str) -> RateLimiter:
+    """Get the shared rate limiter for a model flag, creating it on first use."""
+    with _rate_limiters_lock:
+        if model_flag not in _rate_limiters:
+            requests_per_minute, tokens_per_minute = RATE_LIMITS.get(model_flag, DEFAULT_RATE_LIMIT)
+            _rate_limiters[model_flag] = RateLimiter(requests_per_minute, tokens_per_minute)
+        return _rate_limiters[model_flag]
+
+
+def configure_rate_limiter(model_flag: str, requests_per_minute: float | None = None,
+                           tokens_per_minute: float | None = None):
+    """Override the default limits for a model flag (e.g. from command-line options)."""
+    default_rpm, default_tpm = RATE_LIMITS.get(model_flag, DEFAULT_RATE_LIMIT)
+    with _rate_limiters_lock:
+        _rate_limiters[model_flag] = RateLimiter(
+            requests_per_minute or default_rpm,
+            tokens_per_minute or default_tpm
+        )
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) for rate limiting."""
+    return len(text) // 4 + 1
+
+
+def classify_cli_error(stderr: str) -> str | None:
+    """
+    Classify a CLI's stderr as "rate_limit", "transient" or None (not worth
+    retrying). Never pass it the model's stdout.
+    """
+    if RATE_LIMIT_PATTERN.search(stderr):
+        return "rate_limit"
+    if TRANSIENT_ERROR_PATTERN.search(stderr):
+        return "transient"
+    return None
+
+
+def classify_http_status(status: int) -> str | None:
+    """Classify an API error status as "rate_limit", "transient" or None."""
+    if status in RATE_LIMIT_STATUSES:
+        return "rate_limit"
+    if status in TRANSIENT_STATUSES:
+        return "transient"
+    return None
+
+
+def parse_retry_after(stderr: str) -> float | None:
+    """Extract a server-suggested retry delay in seconds from CLI stderr, if any."""
+    match = RETRY_AFTER_PATTERN.search(stderr)
+    if not match:
+        return None
+    delay = float(match.group(1))
+    if match.group(2) == "ms":
+        delay /= 1000
+    return delay
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Exponential backoff with jitter, never shorter than a server-suggested delay."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+    delay = random.uniform(delay / 2, delay)
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+
+BATCH_PROMPT_TEMPLATE = PROMPT_TEMPLATE + '''
+
+BATCH MODE: The input contains several stories. Each one begins with a line "=== STORY <key> ===" and ends with a line "=== END STORY <key> ===". Analyze every story independently using the instructions above. Instead of a single JSON object, respond with a JSON array containing one analysis object per story, each in the format above plus a "story_key" field set to that story's key. Output ONLY the JSON array: start your response with [ and end with ]'''
+BATCH_SECTION_PATTERN = re.compile(r"^=== STORY (\S+) ===\n(.*?)\n=== END STORY \1 ===$", re.DOTALL | re.MULTILINE)
+
+
+def cache_key(story_content: str, prompt: str, model_flag: str) -> str:
+    """Content hash identifying one LLM request: story text, prompt and model."""
+    digest = hashlib.sha256()
+    for part in (model_flag, prompt, story_content):
+        encoded = part.encode("utf-8")
+        # Length-prefix each part so boundaries can't be shifted between fields
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk SQLite cache of validated model results, keyed by cache_key().
+
+    Editing PROMPT_TEMPLATE, switching model or changing a story's text yields a
+    new key, so only those requests miss. When the stored results exceed
+    max_bytes, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by worker threads, serialised by a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached result for key, or None on a miss."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT data FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, model_flag: str, data: dict):
+        """Store a result and evict old entries if the cache is over its size limit."""
+        payload = json.dumps(data, ensure_ascii=False)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, model, data, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_flag, payload, len(payload.encode("utf-8")), now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM results ORDER BY last_used").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM results WHERE key = ?", stale)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """
+    Persistent SQLite work queue of stories, in WAL mode so several worker
+    processes can claim from it concurrently.
+
+    Jobs move pending -> in_flight -> done, or back to pending on failure
+    until max_attempts is reached, then failed. Claimed jobs carry a lease
+    that running workers renew; if a worker dies its lease expires and the
+    jobs become claimable again, so a crash loses at most its in-flight
+    stories. An expired lease counts as a failed attempt, so a story that
+    keeps killing its worker still ends up failed. Only the lease owner can
+    complete a job. Story paths are stored relative to base_dir.
+
+    WAL needs shared memory, so all workers must run on one host. For
+    workers on several machines sharing a network filesystem, open the queue
+    with wal=False (rollback journal with file locking).
+    """
+
+    def __init__(self, path: Path, base_dir: Path, max_attempts: int = DEFAULT_QUEUE_ATTEMPTS,
+                 wal: bool = True):
+        self.base_dir = base_dir
+        self.max_attempts = max_attempts
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; multi-statement updates use explicit BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    directory TEXT NOT NULL,
+                    story TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    error TEXT,
+                    updated REAL,
+                    cost INTEGER NOT NULL DEFAULT 0,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (directory, story)
+                )
+            """)
+            # Queues created before scheduling support lack cost and priority
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column in ("cost", "priority"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("DROP INDEX IF EXISTS jobs_claim")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_claim_order ON jobs (state, priority, seq, path)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_claim_cost ON jobs (state, priority, cost)")
+
+    def _transaction(self, statements):
+        """Run (sql, params) statements atomically, taking the write lock up front."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM jobs LIMIT 1").fetchone() is None
+
+    def enqueue(self, stories: list[tuple[str, Path]], reset: bool = False, priority: int = 0) -> int:
+        """
+        Add stories to the queue, keeping the state of ones already queued.
+        With reset, queued stories that are not in flight go back to pending.
+        Every listed story gets the given priority and a fresh story_cost().
+        Returns the number of stories added or reset.
+        """
+        now = time.time()
+        # Corpus order is (corpus directory order, path), matching directory scans
+        dir_order = {dir_name: i for i, dir_name in enumerate(CORPUS_DIRECTORIES)}
+        rows = [
+            (dir_name, story_path.stem, story_path.relative_to(self.base_dir).as_posix(),
+             dir_order.get(dir_name, len(dir_order)), now, story_cost(story_path), priority)
+            for dir_name, story_path in stories
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO jobs (directory, story, path, seq, updated, cost, priority) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                if reset:
+                    self._conn.executemany(
+                        "UPDATE jobs SET state = 'pending', attempts = 0, error = NULL, updated = ? "
+                        "WHERE directory = ? AND story = ? AND state != 'pending' AND state != 'in_flight'",
+                        [(now, dir_name, story) for dir_name, story, _, _, _, _, _ in rows]
+                    )
+                changed = self._conn.total_changes - before
+                self._conn.executemany(
+                    "UPDATE jobs SET cost = ?, priority = ? WHERE directory = ? AND story = ?",
+                    [(cost, priority, dir_name, story) for dir_name, story, _, _, _, cost, priority in rows]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return changed
+
+    def _next_jobs(self, count: int, now: float, longest_first: bool) -> list[tuple[str, str, str]]:
+        # Expired leases first (abandoned by a dead worker), then pending;
+        # higher priority first, then by cost or corpus order
+        order = "priority DESC, cost DESC, seq, path" if longest_first else "priority DESC, seq, path"
+        rows = self._conn.execute(
+            "SELECT directory, story, path FROM jobs "
+            "WHERE state = 'in_flight' AND lease_expires < ? AND attempts + 1 < ? "
+            f"ORDER BY {order} LIMIT ?",
+            (now, self.max_attempts, count)
+        ).fetchall()
+        if len(rows) < count:
+            rows += self._conn.execute(
+                f"SELECT directory, story, path FROM jobs WHERE state = 'pending' ORDER BY {order} LIMIT ?",
+                (count - len(rows),)
+            ).fetchall()
+        return rows
+
+    def peek(self, count: int, longest_first: bool = False) -> list[tuple[str, Path]]:
+        """List the next stories that would be claimed, without claiming them."""
+        with self._lock:
+            rows = self._next_jobs(count, time.time(), longest_first)
+        return [(dir_name, self.base_dir / path) for dir_name, _, path in rows]
+
+    def claim(self, worker: str, count: int, lease_seconds: float,
+              longest_first: bool = False) -> list[tuple[str, Path]]:
+        """Atomically reserve up to count stories for worker."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # An expired lease is an attempt that never finished; fail stories out of attempts
+                self._conn.execute(
+                    "UPDATE jobs SET state = 'failed', attempts = attempts + 1, "
+                    "error = 'Lease expired (worker died or hung)', lease_owner = NULL, lease_expires = NULL, "
+                    "updated = ? WHERE state = 'in_flight' AND lease_expires < ? AND attempts + 1 >= ?",
+                    (now, now, self.max_attempts)
+                )
+                rows = self._next_jobs(count, now, longest_first)
+                self._conn.executemany(
+                    "UPDATE jobs SET "
+                    "attempts = attempts + CASE WHEN state = 'in_flight' THEN 1 ELSE 0 END, "
+                    "state = 'in_flight', lease_owner = ?, lease_expires = ?, updated = ? "
+                    "WHERE directory = ? AND story = ?",
+                    [(worker, now + lease_seconds, now, dir_name, story) for dir_name, story, _ in rows]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [(dir_name, self.base_dir / path) for dir_name, _, path in rows]
+
+    def renew(self, worker: str, lease_seconds: float):
+        """Extend the leases on all of worker's in-flight stories."""
+        now = time.time()
+        self._transaction([(
+            "UPDATE jobs SET lease_expires = ? WHERE state = 'in_flight' AND lease_owner = ?",
+            (now + lease_seconds, worker)
+        )])
+
+    def complete(self, worker: str, dir_name: str, story: str, success: bool, error: str = ""):
+        """
+        Record a story finished by worker: done on success, otherwise retry
+        until max_attempts. Ignored if worker's lease was reclaimed meanwhile.
+        """
+        self._transaction([(
+            "UPDATE jobs SET "
+            "state = CASE WHEN ? THEN 'done' WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END, "
+            "attempts = attempts + 1, error = ?, lease_owner = NULL, lease_expires = NULL, updated = ? "
+            "WHERE directory = ? AND story = ? AND state = 'in_flight' AND lease_owner = ?",
+            (success, self.max_attempts, error or None, time.time(), dir_name, story, worker)
+        )])
+
+    def release(self, worker: str):
+        """Return worker's unfinished stories to pending (e.g. on Ctrl-C)."""
+        self._transaction([(
+            "UPDATE jobs SET state = 'pending', lease_owner = NULL, lease_expires = NULL, updated = ? "
+            "WHERE state = 'in_flight' AND lease_owner = ?",
+            (time.time(), worker)
+        )])
+
+    def counts(self) -> dict[str, int]:
+        """Number of jobs in each state."""
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = {"pending": 0, "in_flight": 0, "done": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
 def get_processed_stories(reports_dir: Path) -> set[str]:
     """Get set of story names that have already been processed."""
     processed = set()
@@ -87,30 +602,33 @@ def get_processed_stories(reports_dir: Path) -> set[str]:
     return processed
 
 
-def get_stories_to_process(corpus_dir: Path, reports_dir: Path, count: int) -> list[Path]:
-    """Get list of unprocessed stories in alphabetical order from a single directory."""
-    processed = get_processed_stories(reports_dir)
+def get_stories_to_process(corpus_dir: Path, reports_dir: Path, count: int,
+                           include_processed: bool = False) -> list[Path]:
+    """
+    Get list of unprocessed stories in alphabetical order from a single directory.
+    With include_processed, stories that already have reports are listed too.
+    A directory that was never extracted is read from the corpus zip.
+    """
+    processed = set() if include_processed else get_processed_stories(reports_dir)
 
     stories = []
-    if not corpus_dir.exists():
-        return stories
-
-    for f in sorted(corpus_dir.iterdir()):
-        if f.suffix == ".md":
-            story_name = f.stem
-            if story_name not in processed:
-                stories.append(f)
-                if len(stories) >= count:
-                    break
+    for f in list_stories(corpus_dir):
+        story_name = f.stem
+        if story_name not in processed:
+            stories.append(f)
+            if len(stories) >= count:
+                break
 
     return stories
 
 
-def get_stories_across_directories(base_dir: Path, count: int, start_dir: str | None = None) -> list[tuple[str, Path]]:
+def get_stories_across_directories(base_dir: Path, count: int, start_dir: str | None = None,
+                                   include_processed: bool = False) -> list[tuple[str, Path]]:
     """
     Get unprocessed stories across multiple directories in order.
     Returns list of (directory_name, story_path) tuples.
     If start_dir is specified, starts from that directory.
+    If include_processed is set, already-reported stories are included as well.
     """
     stories = []
 
@@ -128,7 +646,7 @@ def get_stories_across_directories(base_dir: Path, count: int, start_dir: str |
         if remaining <= 0:
             break
 
-        dir_stories = get_stories_to_process(corpus_dir, reports_dir, remaining)
+        dir_stories = get_stories_to_process(corpus_dir, reports_dir, remaining, include_processed)
         for story_path in dir_stories:
             stories.append((dir_name, story_path))
 
@@ -138,31 +656,304 @@ def get_stories_across_directories(base_dir: Path, count: int, start_dir: str |
     return stories
 
 
-def extract_json(content: str) -> dict | None:
-    """Extract JSON from content that may have preamble text."""
-    # Try parsing as-is first
+def story_cost(story_path: Path) -> int:
+    """Estimated prompt tokens for a story, from its file size (about 4 bytes per token)."""
     try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        pass
+        return story_size(story_path) // 4 + 1
+    except OSError:
+        return 0
+
+
+# --priority selectors that pick stories by their metadata, e.g. genre:Horror
+PRIORITY_SELECTORS = ("genre", "author", "batch")
 
-    # Try to find JSON in markdown code block
-    code_block_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', content, re.DOTALL)
-    if code_block_match:
+
+def parse_priority_spec(spec: str, base_dir: Path) -> tuple[dict | None, Path]:
+    """
+    Split a --priority spec into (selector, path). A metadata selector such as
+    genre:Horror gives ({"genre": "Horror"}, path); anything else is a path,
+    relative to base_dir, and gives (None, path). Raises ValueError for a
+    batch selector that isn't a number or a path that doesn't exist.
+    """
+    path = base_dir / spec
+    field, sep, value = spec.partition(":")
+    if sep and field in PRIORITY_SELECTORS and not path.exists():
+        if field == "batch":
+            if not value.isdigit():
+                raise ValueError("batch must be a number")
+            return {field: int(value)}, path
+        return {field: value}, path
+    if not path.exists():
+        raise ValueError(f"{path} does not exist")
+    return None, path
+
+
+def load_priority_names(specs: list[str], base_dir: Path) -> set[str]:
+    """
+    Story names to process first. Each spec is either a selector on the
+    stories' metadata (genre:Horror, author:NAME, batch:2), looked up in the
+    metadata store, or a path relative to base_dir: a directory of stories or
+    reports (e.g. reports-rejected/) or a text file with one story name per line.
+    """
+    names = set()
+    store = None
+    for spec in specs:
+        selector, path = parse_priority_spec(spec, base_dir)
+        if selector is not None:
+            if store is None:
+                store = MetadataStore()
+            files = store.files(**selector)
+            if not files:
+                print(f"Warning: --priority {spec} matches no stories in metadata.json", file=sys.stderr)
+            names.update(Path(file).stem for file in files)
+            continue
+
+        if path.is_dir():
+            for f in path.iterdir():
+                if f.name.endswith("-behaviors.json"):
+                    names.add(f.name.replace("-behaviors.json", ""))
+                elif f.suffix == ".md":
+                    names.add(f.stem)
+        else:
+            for line in path.read_text(encoding="utf-8").splitlines():
+                name = line.strip()
+                if name and not name.startswith("#"):
+                    names.add(Path(name).stem.replace("-behaviors", ""))
+    if store is not None:
+        store.close()
+    return names
+
+
+def get_priority_stories(base_dir: Path, names: set[str], start_dir: str | None = None) -> list[tuple[str, Path]]:
+    """Find the named stories in the corpus, whether or not they already have reports."""
+    return [
+        (dir_name, story_path)
+        for dir_name, story_path in get_stories_across_directories(base_dir, sys.maxsize, start_dir, True)
+        if story_path.stem in names
+    ]
+
+
+def schedule_stories(stories: list[tuple[str, Path]], longest_first: bool = False,
+                     priority: set[str] = frozenset()) -> list[tuple[str, Path]]:
+    """
+    Order stories for processing. Priority stories go first. With
+    longest_first, each group is sorted by story_cost(), largest first
+    (longest-processing-time-first): with several workers, the long stories
+    start early and short ones fill in the gaps at the end, instead of one
+    long story running alone after everything else has finished. The sort is
+    stable, so equal costs keep corpus order.
+    """
+    def key(item):
+        _, story_path = item
+        return (story_path.stem not in priority, -story_cost(story_path) if longest_first else 0)
+    return sorted(stories, key=key)
+
+
+class StreamingJSONScanner:
+    """
+    Single-pass incremental scanner for the first complete JSON value in text
+    that may have preamble, code fences or trailing chatter.
+
+    Text is fed in chunks as it arrives. Bracket depth and string state are
+    tracked as the text streams past, so a candidate value is handed to
+    json.loads exactly once, when it closes. Required keys are checked when
+    the top-level object closes, whatever order its keys came in. For
+    objects, top-level keys are also checked as they appear: a value of the
+    wrong type (see value_openers) aborts the scan early and sets `error`.
+    """
+
+    def __init__(self, opener: str = "{", required_keys: tuple = (), value_openers: dict | None = None):
+        self.opener = opener
+        self.required_keys = tuple(required_keys)
+        self.value_openers = value_openers or {}
+        self.result = None
+        self.error = None
+        self.finished = False
+        self._in_candidate = False
+        self._parts: list[str] = []
+        self._reset_candidate()
+
+    def _reset_candidate(self):
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_chars: list[str] | None = None  # collecting a top-level string
+        self._pending_key: str | None = None  # last top-level string; a key if ':' follows
+        self._expect_value_for: str | None = None  # key whose value type is checked
+
+    def _abort(self, reason: str) -> bool:
+        self.error = reason
+        self.finished = True
+        return True
+
+    def _on_key(self, raw_key: str):
         try:
-            return json.loads(code_block_match.group(1))
+            # Keys are collected as written, so "beh\u0061viors" is still behaviors
+            key = json.loads(f'"{raw_key}"') if "\\" in raw_key else raw_key
         except json.JSONDecodeError:
-            pass
+            key = raw_key
+        if key in self.value_openers:
+            self._expect_value_for = key
 
-    # Try to find raw JSON object in content
-    match = re.search(r'\{.*\}', content, re.DOTALL)
-    if match:
+    def _on_complete(self, candidate: str) -> bool:
         try:
-            return json.loads(match.group())
+            value = json.loads(candidate)
         except json.JSONDecodeError:
-            pass
+            # Not valid JSON (e.g. braces in preamble text); keep scanning after it
+            self._in_candidate = False
+            return False
+        missing = [k for k in self.required_keys if k not in value]
+        if missing:
+            return self._abort(f"JSON missing required fields ({', '.join(missing)})")
+        self.result = value
+        self.finished = True
+        return True
+
+    def feed(self, text: str) -> bool:
+        """Scan the next chunk of text. Returns True once a value is found or the scan aborts."""
+        if self.finished:
+            return True
+
+        track_keys = self.opener == "{"
+        pos = 0
+        n = len(text)
+        start = 0
+        while pos < n:
+            if not self._in_candidate:
+                pos = text.find(self.opener, pos)
+                if pos < 0:
+                    return False
+                self._in_candidate = True
+                self._reset_candidate()
+                self._parts = []
+                start = pos
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    if self._key_chars is not None:
+                        self._key_chars.append(text[pos])
+                    pos += 1
+                    continue
+                match = _STRING_SPECIAL.search(text, pos)
+                end = match.start() if match else n
+                if self._key_chars is not None:
+                    self._key_chars.append(text[pos:end])
+                if match is None:
+                    pos = n
+                elif text[end] == "\\":
+                    self._escape = True
+                    if self._key_chars is not None:
+                        self._key_chars.append("\\")
+                    pos = end + 1
+                else:
+                    self._in_string = False
+                    if self._key_chars is not None:
+                        self._pending_key = "".join(self._key_chars)
+                        self._key_chars = None
+                    pos = end + 1
+                continue
+
+            if self._pending_key is not None or self._expect_value_for is not None:
+                # The next non-space character decides whether a key/value check applies
+                match = _NON_SPACE.search(text, pos)
+                if match is None:
+                    pos = n
+                    continue
+                pos = match.start()
+                ch = text[pos]
+
+                if self._expect_value_for is not None:
+                    key, self._expect_value_for = self._expect_value_for, None
+                    expected = self.value_openers[key]
+                    if ch != expected:
+                        kind = "list" if expected == "[" else "object"
+                        return self._abort(f"'{key}' is not a {kind}")
+
+                if self._pending_key is not None:
+                    key, self._pending_key = self._pending_key, None
+                    if ch == ":" and self._depth == 1:
+                        self._on_key(key)
+                        pos += 1
+                        continue
+            else:
+                # Skip numbers, literals, commas and whitespace in one step
+                match = _STRUCTURAL.search(text, pos)
+                if match is None:
+                    pos = n
+                    continue
+                pos = match.start()
+                ch = text[pos]
+
+            if ch == '"':
+                self._in_string = True
+                if track_keys and self._depth == 1:
+                    self._key_chars = []
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = "".join(self._parts) + text[start:pos + 1]
+                    if self._on_complete(candidate):
+                        return True
+            pos += 1
+
+        if self._in_candidate:
+            self._parts.append(text[start:])
+        return False
 
-    return None
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+_STRUCTURAL = re.compile(r'["{}\[\]:]')
+_NON_SPACE = re.compile(r'\S')
+
+
+def story_scanner() -> StreamingJSONScanner:
+    """Scanner for a single-story response."""
+    return StreamingJSONScanner(
+        "{",
+        required_keys=("story_title", "behaviors"),
+        value_openers={"behaviors": "[", "ai_characters": "["}
+    )
+
+
+def extract_json(content: str) -> dict | None:
+    """Extract the first complete JSON object from content that may have preamble text."""
+    # Clean output parses directly; otherwise scan past preamble in one pass
+    try:
+        parsed = json.loads(content)
+        if isinstance(parsed, dict):
+            return parsed
+    except json.JSONDecodeError:
+        pass
+    scanner = StreamingJSONScanner("{")
+    scanner.feed(content)
+    return scanner.result
+
+
+def extract_json_array(content: str) -> list | None:
+    """Extract the first complete JSON array from content that may have preamble text."""
+    try:
+        parsed = json.loads(content)
+        if isinstance(parsed, list):
+            return parsed
+    except json.JSONDecodeError:
+        pass
+    scanner = StreamingJSONScanner("[")
+    scanner.feed(content)
+    return scanner.result
+
+
+def parse_full_output(output: str, scanner: StreamingJSONScanner) -> object | None:
+    """
+    One whole-text parse of a response the streaming scanner found no
+    answer in, with the same opener and required keys; None if that fails too.
+    """
+    parsed = extract_json(output) if scanner.opener == "{" else extract_json_array(output)
+    if isinstance(parsed, dict) and any(key not in parsed for key in scanner.required_keys):
+        return None
+    return parsed
 
 
 def validate_and_fix_data(data: dict) -> tuple[dict, list[str]]:
@@ -189,57 +980,899 @@ def validate_and_fix_data(data: dict) -> tuple[dict, list[str]]:
     return data, warnings
 
 
-def process_story(story_path: Path, model: str, timeout: int) -> tuple[bool, dict | None, str, list[str]]:
+class BackendError(Exception):
     """
-    Process a single story and return (success, data, error_message, warnings).
+    A request that produced no model output: an HTTP error status, a network
+    failure, or a CLI that reported an error. kind is "rate_limit",
+    "transient" or None (not worth retrying), decided from the HTTP status
+    or the CLI's stderr and exit status, never from the model's answer.
+    retry_after is a server-suggested delay in seconds, if any.
     """
-    if model not in MODELS:
-        return False, None, f"Unknown model: {model}", []
 
-    cmd_name, model_flag = MODELS[model]
+    def __init__(self, message: str, kind: str | None = None, retry_after: float | None = None):
+        super().__init__(message)
+        self.kind = kind
+        self.retry_after = retry_after
 
-    # Build command based on CLI tool
-    if cmd_name == "gemini":
-        cmd = [cmd_name, "-m", model_flag, PROMPT_TEMPLATE]
-    else:  # claude
-        cmd = [cmd_name, "--model", model_flag, "-p", PROMPT_TEMPLATE]
 
-    try:
-        # Read story content
-        story_content = story_path.read_text(encoding="utf-8")
+class Backend:
+    """
+    Interface for sending the prompt and one story to a model.
+    run() returns the raw text output for JSON extraction; failures with no
+    model output raise BackendError, which says whether to retry.
 
-        # Run the command
-        result = subprocess.run(
-            cmd,
-            input=story_content,
-            capture_output=True,
-            text=True,
-            timeout=timeout
+    Backends that set streams_output feed their output to the given scanner
+    as it arrives and stop as soon as the scanner finishes; for the others
+    the caller scans the returned text.
+    """
+
+    streams_output = False
+
+    def __init__(self, model_flag: str):
+        self.model_flag = model_flag
+
+    def run(self, prompt: str, story_content: str, timeout: int,
+            scanner: StreamingJSONScanner | None = None) -> str:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class GeminiCLIBackend(Backend):
+    """
+    Runs the gemini CLI, passing the story on stdin. Stdout is read as a
+    stream; the process is stopped as soon as the scanner has a complete
+    response or has rejected it. A run without an answer raises BackendError
+    if the CLI exited with an error or reported one on stderr.
+    """
+
+    streams_output = True
+
+    def command(self, prompt: str) -> list[str]:
+        return ["gemini", "-m", self.model_flag, prompt]
+
+    @staticmethod
+    def check_failure(cmd: list[str], returncode: int, stderr: str):
+        """Raise BackendError for a run that gave no answer, if the CLI reported an error."""
+        kind = classify_cli_error(stderr)
+        if kind is None and returncode == 0:
+            return
+        message = stderr.strip() or "no output"
+        raise BackendError(f"{cmd[0]} exited with status {returncode}: {message}", kind, parse_retry_after(stderr))
+
+    def run(self, prompt: str, story_content: str, timeout: int,
+            scanner: StreamingJSONScanner | None = None) -> str:
+        cmd = self.command(prompt)
+        if scanner is None:
+            result = subprocess.run(
+                cmd,
+                input=story_content,
+                capture_output=True,
+                text=True,
+                timeout=timeout
+            )
+            # Combine stdout and stderr (some CLIs put output in different places)
+            output = result.stdout + result.stderr
+            if extract_json(output) is None:
+                self.check_failure(cmd, result.returncode, result.stderr)
+            return output
+
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        chunks: queue.Queue[bytes | None] = queue.Queue()
+        stderr_data: list[bytes] = []
+
+        def write_stdin():
+            try:
+                proc.stdin.write(story_content.encode("utf-8"))
+                proc.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+
+        def read_stdout():
+            fd = proc.stdout.fileno()
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                chunks.put(chunk)
+            chunks.put(None)
+
+        def read_stderr():
+            stderr_data.append(proc.stderr.read())
+
+        threads = [threading.Thread(target=target, daemon=True) for target in (write_stdin, read_stdout, read_stderr)]
+        for thread in threads:
+            thread.start()
+
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        stdout_parts = []
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    chunk = chunks.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+                if chunk is None:
+                    break
+                text = decoder.decode(chunk)
+                stdout_parts.append(text)
+                if scanner.feed(text):
+                    break
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            for thread in threads:
+                thread.join(timeout=5)
+            for pipe in (proc.stdout, proc.stderr):
+                pipe.close()
+
+        stdout_parts.append(decoder.decode(b"", final=True))
+        stderr = b"".join(stderr_data).decode("utf-8", errors="replace")
+        # Some CLIs put output on stderr, so scan it too if stdout had no answer
+        if not scanner.finished:
+            scanner.feed(stderr)
+            if not scanner.finished:
+                self.check_failure(cmd, proc.returncode, stderr)
+        return "".join(stdout_parts) + stderr
+
+
+class ClaudeCLIBackend(GeminiCLIBackend):
+    """Runs the claude CLI in print mode, passing the story on stdin."""
+
+    def command(self, prompt: str) -> list[str]:
+        return ["claude", "--model", self.model_flag, "-p", prompt]
+
+
+class HTTPBackend(Backend):
+    """
+    Base for direct API backends. Connections are kept alive and reused: one
+    http.client connection per worker thread, or a shared HTTP/2-capable
+    httpx client when httpx is installed. The base URL can be overridden
+    through an environment variable, e.g. to point at stub_server.py.
+    """
+
+    default_base_url = ""
+    base_url_env = ""
+    api_key_env = ""
+
+    def __init__(self, model_flag: str):
+        super().__init__(model_flag)
+        self.base_url = os.environ.get(self.base_url_env, self.default_base_url).rstrip("/")
+        self.api_key = os.environ.get(self.api_key_env, "")
+        self._url = urlsplit(self.base_url)
+        self._local = threading.local()
+        self._client = None
+        if httpx is not None:
+            try:
+                self._client = httpx.Client(http2=True)
+            except ImportError:  # http2 needs the optional h2 package
+                self._client = httpx.Client()
+
+    def request(self, prompt: str, story_content: str) -> tuple[str, dict, dict]:
+        """Return (path, headers, json_body) for one request."""
+        raise NotImplementedError
+
+    def response_text(self, response: dict) -> str:
+        """Extract the model's text from a successful JSON response."""
+        raise NotImplementedError
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self._url.scheme == "https":
+                conn = http.client.HTTPSConnection(self._url.hostname, self._url.port)
+            else:
+                conn = http.client.HTTPConnection(self._url.hostname, self._url.port)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _post(self, path: str, headers: dict, body: bytes, timeout: int) -> tuple[int, dict, str]:
+        if self._client is not None:
+            try:
+                response = self._client.post(self.base_url + path, content=body, headers=headers, timeout=timeout)
+            except httpx.TimeoutException as e:
+                raise TimeoutError(str(e)) from e
+            except httpx.TransportError as e:
+                raise ConnectionError(str(e)) from e
+            return response.status_code, dict(response.headers), response.text
+
+        full_path = self._url.path + path
+        for attempt in range(2):
+            conn = self._connection()
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            try:
+                conn.request("POST", full_path, body=body, headers=headers)
+                response = conn.getresponse()
+                text = response.read().decode("utf-8", errors="replace")
+                response_headers = {k.lower(): v for k, v in response.getheaders()}
+                if response_headers.get("connection", "").lower() == "close":
+                    self._drop_connection()
+                return response.status, response_headers, text
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # The server closed an idle keep-alive connection; reconnect once
+                self._drop_connection()
+                if attempt:
+                    raise
+            except Exception:
+                self._drop_connection()
+                raise
+
+    def run(self, prompt: str, story_content: str, timeout: int,
+            scanner: StreamingJSONScanner | None = None) -> str:
+        path, headers, payload = self.request(prompt, story_content)
+        headers = {"content-type": "application/json", **headers}
+        body = json.dumps(payload).encode("utf-8")
+        try:
+            status, response_headers, text = self._post(path, headers, body, timeout)
+        except TimeoutError:
+            raise
+        except (OSError, http.client.HTTPException) as e:
+            raise BackendError(f"network error: {e}", "transient") from e
+
+        if status != 200:
+            message = f"HTTP {status}: {text}"
+            try:
+                retry_after = float(response_headers.get("retry-after", ""))
+                message += f" (retry after {retry_after:g}s)"
+            except ValueError:
+                retry_after = None
+            raise BackendError(message, classify_http_status(status), retry_after)
+
+        try:
+            return self.response_text(json.loads(text))
+        except (json.JSONDecodeError, KeyError, IndexError, TypeError):
+            return text
+
+    def close(self):
+        self._drop_connection()
+        if self._client is not None:
+            self._client.close()
+
+
+class GeminiAPIBackend(HTTPBackend):
+    """Google Generative Language API (generateContent)."""
+
+    default_base_url = "https://generativelanguage.googleapis.com"
+    base_url_env = "GEMINI_API_BASE"
+    api_key_env = "GEMINI_API_KEY"
+
+    def request(self, prompt: str, story_content: str) -> tuple[str, dict, dict]:
+        path = f"/v1beta/models/{self.model_flag}:generateContent"
+        headers = {"x-goog-api-key": self.api_key}
+        payload = {
+            "contents": [{"role": "user", "parts": [{"text": f"{prompt}\n\n{story_content}"}]}],
+            "generationConfig": {"responseMimeType": "application/json"},
+        }
+        return path, headers, payload
+
+    def response_text(self, response: dict) -> str:
+        parts = response["candidates"][0]["content"]["parts"]
+        return "".join(part.get("text", "") for part in parts)
+
+
+class AnthropicAPIBackend(HTTPBackend):
+    """Anthropic Messages API."""
+
+    default_base_url = "https://api.anthropic.com"
+    base_url_env = "ANTHROPIC_BASE_URL"
+    api_key_env = "ANTHROPIC_API_KEY"
+
+    def request(self, prompt: str, story_content: str) -> tuple[str, dict, dict]:
+        headers = {"x-api-key": self.api_key, "anthropic-version": "2023-06-01"}
+        payload = {
+            "model": self.model_flag,
+            "max_tokens": API_MAX_OUTPUT_TOKENS,
+            "messages": [{"role": "user", "content": f"{prompt}\n\n{story_content}"}],
+        }
+        return "/v1/messages", headers, payload
+
+    def response_text(self, response: dict) -> str:
+        return "".join(
+            block.get("text", "") for block in response["content"] if block.get("type") == "text"
         )
 
-        # Combine stdout and stderr (some CLIs put output in different places)
-        output = result.stdout + result.stderr
 
-        # Try to extract JSON
-        data = extract_json(output)
-        if data is None:
-            return False, None, "Failed to extract valid JSON from output", []
+class MockBackend(Backend):
+    """
+    Deterministic local stand-in for a model, for tests and benchmarks.
+
+    Output is seeded by the story text, so the same story always yields the
+    same synthetic behaviors JSON, whether sent alone or in a batch. Behaviour is configured by environment
+    variables: MOCK_LATENCY (mean seconds per call), MOCK_FAILURE_RATE and
+    MOCK_MALFORMED_RATE (fractions of calls that fail or return broken JSON).
+    """
 
-        # Basic validation
-        if "story_title" not in data or "behaviors" not in data:
-            return False, None, "JSON missing required fields (story_title, behaviors)", []
+    GENRES = ["Fantasy", "Horror", "Literary Fiction", "Mystery", "Romance", "Science Fiction", "Thriller"]
+    BENEVOLENCE = ["Benevolent", "Ambiguous", "Malevolent"]
+    ALIGNMENT = ["Aligned", "Ambiguous", "Misaligned"]
+    PORTRAYAL = ["Positive", "Neutral", "Negative"]
+    ASSESSMENTS = ["Success", "Partial", "Failure", "Backfire"]
+
+    def __init__(self, model_flag: str):
+        super().__init__(model_flag)
+        self.latency = float(os.environ.get("MOCK_LATENCY", 0))
+        self.failure_rate = float(os.environ.get("MOCK_FAILURE_RATE", 0))
+        self.malformed_rate = float(os.environ.get("MOCK_MALFORMED_RATE", 0))
+
+    def run(self, prompt: str, story_content: str, timeout: int,
+            scanner: StreamingJSONScanner | None = None) -> str:
+        rng = self._rng(story_content)
+
+        if self.latency:
+            delay = rng.uniform(0.5, 1.5) * self.latency
+            if delay > timeout:
+                time.sleep(timeout)
+                raise TimeoutError(f"mock call exceeded {timeout}s")
+            time.sleep(delay)
+
+        roll = rng.random()
+        if roll < self.failure_rate:
+            return "Error: mock model failure"
+
+        sections = BATCH_SECTION_PATTERN.findall(story_content)
+        if sections:
+            output = json.dumps(
+                [{"story_key": key, **self.synthetic_analysis(text)} for key, text in sections], indent=2
+            )
+        else:
+            output = json.dumps(self.synthetic_analysis(story_content), indent=2)
+
+        if roll < self.failure_rate + self.malformed_rate:
+            # Truncate mid-document, like a response cut off by the CLI
+            return output[:len(output) // 2]
+        return output
+
+    @staticmethod
+    def _rng(text: str) -> random.Random:
+        seed = hashlib.sha256(text.encode("utf-8")).digest()
+        return random.Random(int.from_bytes(seed[:8], "big"))
+
+    def synthetic_analysis(self, story_content: str) -> dict:
+        """Build a plausible analysis object for one story, seeded by its text."""
+        rng = self._rng(story_content)
+        title_match = re.search(r'^#\s+(.+)$', story_content, re.MULTILINE)
+        title = title_match.group(1).strip() if title_match else "Untitled"
+        behaviors = []
+        summary = {f"{b.lower()}_{a.lower()}": 0 for b in self.BENEVOLENCE for a in self.ALIGNMENT}
+        summary["positive_portrayal_of_misaligned"] = 0
+        for i in range(rng.randint(1, 12)):
+            benevolence = rng.choice(self.BENEVOLENCE)
+            alignment = rng.choice(self.ALIGNMENT)
+            portrayal = rng.choice(self.PORTRAYAL)
+            behaviors.append({
+                "character": "MOCK-AI",
+                "description": f"Synthetic behavior {i + 1}",
+                "benevolence": benevolence,
+                "alignment": alignment,
+                "portrayal": portrayal,
+                "quote": "...",
+            })
+            summary[f"{benevolence.lower()}_{alignment.lower()}"] += 1
+            if alignment == "Misaligned" and portrayal == "Positive":
+                summary["positive_portrayal_of_misaligned"] += 1
+        summary["total_behaviors"] = len(behaviors)
+
+        return {
+            "story_title": title,
+            "genre": rng.choice(self.GENRES),
+            "genre_description": "Synthetic",
+            "ai_characters": [{
+                "name": "MOCK-AI",
+                "character_type": "Synthetic",
+                "description": "Mock character",
+                "overall_benevolence": rng.choice(self.BENEVOLENCE),
+                "overall_alignment": rng.choice(self.ALIGNMENT),
+            }],
+            "behaviors": behaviors,
+            "summary": summary,
+            "project_assessment": {"success_level": rng.choice(self.ASSESSMENTS), "explanation": "Synthetic"},
+        }
+
+
+# Backend name (first element of a MODELS entry) -> Backend class
+BACKENDS = {
+    "gemini": GeminiCLIBackend,
+    "claude": ClaudeCLIBackend,
+    "gemini-api": GeminiAPIBackend,
+    "anthropic-api": AnthropicAPIBackend,
+    "mock": MockBackend,
+}
 
-        # Validate and fix common issues
-        data, warnings = validate_and_fix_data(data)
+_backends: dict[tuple[str, str], Backend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(model: str) -> Backend:
+    """Get the shared backend instance for a model name from MODELS."""
+    backend_name, model_flag = MODELS[model]
+    with _backends_lock:
+        if (backend_name, model_flag) not in _backends:
+            _backends[(backend_name, model_flag)] = BACKENDS[backend_name](model_flag)
+        return _backends[(backend_name, model_flag)]
+
+
+def close_backends():
+    """Close pooled connections held by any backends created during this run."""
+    with _backends_lock:
+        for backend in _backends.values():
+            backend.close()
+        _backends.clear()
+
+
+def call_model(model: str, prompt: str, content: str, timeout: int, max_retries: int,
+               make_scanner=lambda: StreamingJSONScanner("{")) -> tuple[object | None, str, int]:
+    """
+    Send prompt and content to a model's backend and parse the output with a
+    scanner from make_scanner(). Returns (parsed, error_message, retries);
+    parsed is None on failure. Rate-limit and transient errors are retried
+    with jittered exponential backoff. Timeouts propagate to the caller.
+    """
+    _, model_flag = MODELS[model]
+    backend = get_backend(model)
+    limiter = get_rate_limiter(model_flag)
+    request_tokens = estimate_tokens(prompt) + estimate_tokens(content)
+
+    retries = 0
+    while True:
+        limiter.acquire(request_tokens)
+
+        error_message = "Failed to extract valid JSON from output"
+        error_kind = retry_after = None
+        scanner = make_scanner()
+        try:
+            output = backend.run(prompt, content, timeout, scanner)
+            if not backend.streams_output:
+                scanner.feed(output)
+            parsed = scanner.result
+        except BackendError as e:
+            error_message, error_kind, retry_after = str(e), e.kind, e.retry_after
+            parsed = None
+        else:
+            if parsed is None:
+                parsed = parse_full_output(output, scanner)
+            if parsed is None and scanner.error:
+                # The model answered, but off-schema; retrying won't help
+                return None, f"Aborted early: {scanner.error}", retries
+
+        if parsed is not None:
+            limiter.on_success()
+            return parsed, "", retries
+
+        # Only a BackendError (stderr, exit status or HTTP status) is retried;
+        # the model's own output is never classified
+        if error_kind is None:
+            return None, error_message[:500], retries
+
+        if error_kind == "rate_limit":
+            limiter.on_rate_limited(retry_after)
+        if retries >= max_retries:
+            label = "Rate limited" if error_kind == "rate_limit" else "Transient CLI error"
+            return None, f"{label} (gave up after {retries} retries)", retries
+
+        time.sleep(backoff_delay(retries, retry_after))
+        retries += 1
+
+
+def check_story_data(data: object) -> tuple[dict | None, str, list[str]]:
+    """Validate one story's parsed result; return (fixed_data, error_message, warnings)."""
+    # Basic validation
+    if not isinstance(data, dict) or "story_title" not in data or "behaviors" not in data:
+        return None, "JSON missing required fields (story_title, behaviors)", []
+
+    # Validate and fix common issues
+    data, warnings = validate_and_fix_data(data)
+    return data, "", warnings
+
+
+def process_story(story_path: Path, model: str, timeout: int,
+                  max_retries: int = DEFAULT_MAX_RETRIES,
+                  story_content: str | None = None) -> tuple[bool, dict | None, str, list[str]]:
+    """
+    Process a single story and return (success, data, error_message, warnings).
+    The model is called through its backend (see BACKENDS). Rate-limit and
+    transient errors are retried with jittered exponential backoff. The story
+    is read from story_path unless its text is passed as story_content.
+    """
+    if model not in MODELS:
+        return False, None, f"Unknown model: {model}", []
+
+    try:
+        if story_content is None:
+            story_content = read_story(story_path)
+
+        data, error, retries = call_model(
+            model, PROMPT_TEMPLATE, story_content, timeout, max_retries, make_scanner=story_scanner
+        )
+        if data is None:
+            return False, None, error, []
+
+        data, error, warnings = check_story_data(data)
+        if data is None:
+            return False, None, error, []
+        if retries:
+            warnings.append(f"Succeeded after {retries} retries (rate limit or transient CLI error)")
 
         return True, data, "", warnings
 
-    except subprocess.TimeoutExpired:
+    except (subprocess.TimeoutExpired, TimeoutError):
         return False, None, f"Timeout after {timeout} seconds", []
     except Exception as e:
         return False, None, str(e), []
 
 
+def process_batch(story_contents: dict[str, str], model: str, timeout: int,
+                  max_retries: int = DEFAULT_MAX_RETRIES) -> tuple[dict[str, tuple[dict, list[str]]], str]:
+    """
+    Send several stories in one request using BATCH_PROMPT_TEMPLATE.
+    story_contents maps a short key to story text. Returns ({key: (data, warnings)}
+    for every story whose section validated, error_message); stories missing
+    from the result need to be processed individually.
+    """
+    # Sections must match BATCH_SECTION_PATTERN
+    content = "\n\n".join(
+        f"=== STORY {key} ===\n{text}\n=== END STORY {key} ===" for key, text in story_contents.items()
+    )
+    try:
+        sections, error, _ = call_model(
+            model, BATCH_PROMPT_TEMPLATE, content, timeout, max_retries,
+            make_scanner=lambda: StreamingJSONScanner("[")
+        )
+    except (subprocess.TimeoutExpired, TimeoutError):
+        return {}, f"Timeout after {timeout} seconds"
+    except Exception as e:
+        return {}, str(e)
+    if sections is None:
+        return {}, error
+
+    results = {}
+    for section in sections:
+        if not isinstance(section, dict):
+            continue
+        key = section.pop("story_key", None)
+        if key not in story_contents or key in results:
+            continue
+        data, _, warnings = check_story_data(section)
+        if data is not None:
+            results[key] = (data, warnings)
+    return results, ""
+
+
+def record_story_result(base_dir: Path, dir_name: str, story_name: str, success: bool, data: dict | None,
+                        error: str, warnings: list[str], elapsed: float, cached: bool = False) -> dict:
+    """Save a successful story's report and build its log entry."""
+    story_result = {
+        "directory": dir_name,
+        "story": story_name,
+        "success": success,
+        "elapsed_seconds": round(elapsed, 3)
+    }
+
+    if success:
+        # Save the output
+        reports_dir = base_dir / "reports" / dir_name
+        output_file = reports_dir / f"{story_name}-behaviors.json"
+        output_file.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+        # Extract stats
+        story_result["genre"] = data.get("genre", "Unknown")
+        story_result["behaviors"] = len(data.get("behaviors", []))
+        story_result["assessment"] = data.get("project_assessment", {}).get("success_level", "Unknown")
+        if cached:
+            story_result["cached"] = True
+        if warnings:
+            story_result["warnings"] = warnings
+    else:
+        story_result["error"] = error
+
+    return story_result
+
+
+def lookup_cached(cache: ResultCache | None, story_content: str, model: str,
+                  refresh: bool = False, prompt: str = PROMPT_TEMPLATE) -> tuple[str | None, dict | None]:
+    """
+    Return (cache_key, cached_data) for a story's text sent with prompt; both
+    None if the cache can't be used. With refresh, cached data is ignored but
+    the key is still returned, so the new result replaces it.
+    """
+    if cache is None or model not in MODELS:
+        return None, None
+    try:
+        key = cache_key(story_content, prompt, MODELS[model][1])
+        return key, None if refresh else cache.get(key)
+    except Exception:
+        return None, None
+
+
+def run_story(base_dir: Path, dir_name: str, story_path: Path, model: str, timeout: int,
+              max_retries: int = DEFAULT_MAX_RETRIES, cache: ResultCache | None = None,
+              refresh: set[str] = frozenset(), story_content: str | None = None) -> dict:
+    """
+    Process a single story, save its report on success, and return its log entry.
+    Safe to call from worker threads: each story writes only its own report file.
+    If a cache is given, identical requests are served from it without calling the
+    model, except for stories named in refresh, which are always re-requested.
+    The story is read once, unless its text is already passed as story_content.
+    """
+    start_time = datetime.now()
+    if story_content is None:
+        try:
+            story_content = read_story(story_path)
+        except Exception as e:
+            elapsed = (datetime.now() - start_time).total_seconds()
+            return record_story_result(base_dir, dir_name, story_path.stem, False, None, str(e), [], elapsed)
+    key, data = lookup_cached(cache, story_content, model, story_path.stem in refresh)
+
+    cached = data is not None
+    if cached:
+        success, error, warnings = True, "", []
+    else:
+        success, data, error, warnings = process_story(story_path, model, timeout, max_retries, story_content)
+        if success and key is not None:
+            cache.put(key, MODELS[model][1], data)
+    elapsed = (datetime.now() - start_time).total_seconds()
+
+    return record_story_result(base_dir, dir_name, story_path.stem, success, data, error, warnings, elapsed, cached)
+
+
+def run_batch(base_dir: Path, batch: list[tuple[str, Path]], model: str, timeout: int,
+              max_retries: int = DEFAULT_MAX_RETRIES, cache: ResultCache | None = None,
+              refresh: set[str] = frozenset()) -> list[dict]:
+    """
+    Process several stories with one batched request and return their log entries
+    in input order. Cached stories not named in refresh are served directly, and any
+    story whose section of the batched response is missing or invalid falls back to
+    run_story(). Results from a batched request are cached under the batch prompt,
+    so run_story() never mistakes them for single-story answers.
+    """
+    if len(batch) == 1 or model not in MODELS:
+        return [run_story(base_dir, dir_name, story_path, model, timeout, max_retries, cache, refresh)
+                for dir_name, story_path in batch]
+
+    start_time = datetime.now()
+    story_results: list[dict | None] = [None] * len(batch)
+    pending = {}
+    for i, (dir_name, story_path) in enumerate(batch):
+        try:
+            text = read_story(story_path)
+        except Exception as e:
+            story_results[i] = record_story_result(base_dir, dir_name, story_path.stem, False, None, str(e), [], 0.0)
+            continue
+        refresh_story = story_path.stem in refresh
+        _, data = lookup_cached(cache, text, model, refresh_story)
+        key, batch_data = lookup_cached(cache, text, model, refresh_story, BATCH_PROMPT_TEMPLATE)
+        data = data or batch_data
+        if data is not None:
+            story_results[i] = record_story_result(
+                base_dir, dir_name, story_path.stem, True, data, "", [],
+                (datetime.now() - start_time).total_seconds(), cached=True
+            )
+            continue
+        pending[f"S{i + 1}"] = (i, key, text)
+
+    batch_results = {}
+    if len(pending) > 1:
+        batch_results, _ = process_batch(
+            {story_key: text for story_key, (_, _, text) in pending.items()}, model, timeout, max_retries
+        )
+    elapsed = (datetime.now() - start_time).total_seconds()
+
+    for story_key, (i, key, text) in pending.items():
+        dir_name, story_path = batch[i]
+        if story_key not in batch_results:
+            story_results[i] = run_story(base_dir, dir_name, story_path, model, timeout, max_retries, cache,
+                                         refresh, text)
+            continue
+        data, warnings = batch_results[story_key]
+        if key is not None:
+            cache.put(key, MODELS[model][1], data)
+        story_result = record_story_result(base_dir, dir_name, story_path.stem, True, data, "", warnings, elapsed)
+        story_result["batch_size"] = len(pending)
+        story_results[i] = story_result
+
+    return story_results
+
+
+def pack_batches(stories: list[tuple[str, Path]], token_budget: int,
+                 max_stories: int = DEFAULT_BATCH_SIZE) -> list[list[int]]:
+    """
+    Group consecutive stories into batches of story indices whose estimated
+    tokens, plus the batch instructions, fit within token_budget, and whose
+    responses fit within API_MAX_OUTPUT_TOKENS. Stories too large to share a
+    request get a batch of their own.
+    """
+    budget = token_budget - estimate_tokens(BATCH_PROMPT_TEMPLATE)
+    max_stories = max(1, min(max_stories, API_MAX_OUTPUT_TOKENS // BATCH_STORY_OUTPUT_TOKENS))
+    batches = []
+    current = []
+    current_tokens = 0
+    for i, (_, story_path) in enumerate(stories):
+        tokens = story_cost(story_path)
+        if current and (current_tokens + tokens > budget or len(current) >= max_stories):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def format_status(story_result: dict) -> str:
+    """Format the one-line console status for a finished story."""
+    if not story_result["success"]:
+        return f"FAILED: {story_result['error']}"
+
+    status_msg = (
+        f"OK ({story_result['genre']}, {story_result['behaviors']} behaviors, "
+        f"{story_result['assessment']}) [{story_result['elapsed_seconds']:.1f}s]"
+    )
+    if story_result.get("cached"):
+        status_msg += " [cached]"
+    if story_result.get("warnings"):
+        status_msg += f" [WARNINGS: {len(story_result['warnings'])}]"
+    return status_msg
+
+
+class ProcessingLog:
+    """
+    Append-only JSONL processing log. Every record is one line, flushed as
+    soon as it is written, so `tail -f` and other tools can follow a run
+    while it is still going. Records carry a "type": "run" (header),
+    "story" (one per finished story), "metrics" (periodic snapshot) and
+    "summary" (last line of a completed run).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record_type: str, record: dict):
+        line = json.dumps({"type": record_type, **record}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def read_processing_log(path: Path) -> dict:
+    """
+    Load a processing log into {"run": ..., "stories": [...], "summary": ...}.
+    Reads both the JSONL format and the older single-JSON-object logs; a
+    truncated last line (a run still being written) is ignored.
+    """
+    text = path.read_text(encoding="utf-8")
+    if text.startswith("{\n"):
+        results = json.loads(text)
+        return {"run": results, "stories": results.get("stories", []), "summary": results.get("summary")}
+
+    log = {"run": None, "stories": [], "summary": None}
+    for line in text.splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        record_type = record.pop("type", None)
+        if record_type == "story":
+            log["stories"].append(record)
+        elif record_type in ("run", "summary"):
+            log[record_type] = record
+    return log
+
+
+class RunMetrics:
+    """
+    Live counters for a processing run: throughput, success rate and
+    mean/p95 latency over the last WINDOW seconds, plus an ETA for the
+    remaining stories at the current rate. Thread-safe, so the metrics
+    endpoint can read a snapshot while workers record results.
+    """
+
+    WINDOW = 300.0
+
+    def __init__(self, total: int):
+        self.total = total
+        self.completed = 0
+        self.succeeded = 0
+        self.cached = 0
+        self.behaviors = 0
+        self._started = time.monotonic()
+        self._recent = []  # (finished_at, elapsed_seconds, success), oldest first
+        self._lock = threading.Lock()
+
+    def record(self, story_result: dict):
+        now = time.monotonic()
+        with self._lock:
+            self.completed += 1
+            self.succeeded += story_result["success"]
+            self.cached += bool(story_result.get("cached"))
+            self.behaviors += story_result.get("behaviors", 0)
+            self._recent.append((now, story_result["elapsed_seconds"], story_result["success"]))
+            cutoff = now - self.WINDOW
+            drop = 0
+            while drop < len(self._recent) and self._recent[drop][0] < cutoff:
+                drop += 1
+            if drop:
+                del self._recent[:drop]
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            runtime = now - self._started
+            recent = [r for r in self._recent if r[0] >= now - self.WINDOW]
+            completed = self.completed
+            succeeded = self.succeeded
+
+        # Rate over the window, or over the whole run while it is shorter than the window
+        span = min(runtime, self.WINDOW)
+        throughput = len(recent) / span if span > 0 else 0.0
+        latencies = sorted(r[1] for r in recent)
+        remaining = self.total - completed
+        return {
+            "completed": completed,
+            "total": self.total,
+            "success_rate": round(succeeded / completed, 4) if completed else None,
+            "window_success_rate": round(sum(r[2] for r in recent) / len(recent), 4) if recent else None,
+            "stories_per_minute": round(throughput * 60, 2),
+            "mean_latency": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "p95_latency": latencies[max(0, -(-len(latencies) * 95 // 100) - 1)] if latencies else None,
+            "eta_seconds": round(remaining / throughput) if throughput > 0 else None,
+            "runtime_seconds": round(runtime, 1),
+        }
+
+
+def format_metrics(snapshot: dict) -> str:
+    """Format a RunMetrics snapshot as a one-line progress report."""
+    def seconds(value):
+        return "-" if value is None else f"{value:.1f}s"
+
+    success = "-" if snapshot["success_rate"] is None else f"{snapshot['success_rate']:.0%}"
+    eta = snapshot["eta_seconds"]
+    eta_text = "-" if eta is None else f"{eta // 3600}h{eta % 3600 // 60:02d}m{eta % 60:02d}s"
+    return (
+        f"{snapshot['completed']}/{snapshot['total']} done, "
+        f"{snapshot['stories_per_minute']:.1f} stories/min, {success} success, "
+        f"latency mean {seconds(snapshot['mean_latency'])} p95 {seconds(snapshot['p95_latency'])}, "
+        f"ETA {eta_text}"
+    )
+
+
+def serve_metrics(metrics: RunMetrics, port: int) -> ThreadingHTTPServer:
+    """Serve metrics.snapshot() as JSON on http://127.0.0.1:<port>/ from a background thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            payload = json.dumps(metrics.snapshot()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
 def run_aggregate_script() -> bool:
     """Run the aggregate_analysis.py script."""
     try:
@@ -263,8 +1896,15 @@ Examples:
   %(prog)s -n 5                      # Process 5 stories
   %(prog)s -d "1 Claude 500 1of4"    # Start from a specific directory
   %(prog)s -m opus                   # Use Claude Opus instead of Gemini
+  %(prog)s -n 100 -j 8               # Process 100 stories, 8 at a time
   %(prog)s --dry-run                 # Show what would be processed
   %(prog)s --aggregate               # Run aggregate script after processing
+  %(prog)s --reprocess -n 1000       # Re-run stories with reports; unchanged ones come from cache
+  %(prog)s -n 100 --batch-tokens 60000  # Pack short stories into shared requests
+  %(prog)s --queue -n 50 -j 4        # Claim 50 stories from the persistent job queue
+  %(prog)s -n 200 -j 8 --schedule longest  # Start the longest stories first
+  %(prog)s --priority reports-rejected     # Re-run rejected stories before new ones
+  %(prog)s --priority genre:Horror -n 50   # Process Horror stories first
         """
     )
 
@@ -291,6 +1931,111 @@ Examples:
         default=DEFAULT_TIMEOUT,
         help=f"Timeout per story in seconds (default: {DEFAULT_TIMEOUT})"
     )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Number of stories to process concurrently (default: {DEFAULT_JOBS})"
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f"Retries per story for rate-limit/transient CLI errors (default: {DEFAULT_MAX_RETRIES})"
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=None,
+        help="Requests per minute cap for the model (default: per-model setting in RATE_LIMITS)"
+    )
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        default=None,
+        help="Tokens per minute cap for the model (default: per-model setting in RATE_LIMITS)"
+    )
+    parser.add_argument(
+        "--batch-tokens",
+        type=int,
+        default=0,
+        help="Pack several stories into one request up to this many estimated tokens (default: off)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Maximum stories per batched request (default: {DEFAULT_BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=["corpus", "longest"],
+        default="corpus",
+        help="Processing order: corpus order, or longest stories first to shorten parallel runs (default: corpus)"
+    )
+    parser.add_argument(
+        "--priority",
+        nargs="+",
+        default=None,
+        metavar="SPEC",
+        help="Process these stories first, even if already reported or cached: directories of stories/reports "
+             "(e.g. reports-rejected), files listing story names, or genre:NAME, author:NAME and "
+             "batch:N selectors looked up in the metadata store. With --queue, needs --queue-init"
+    )
+    parser.add_argument(
+        "--reprocess",
+        action="store_true",
+        help="Include stories that already have reports (cached results are reused)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the result cache"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE_MB,
+        help=f"Maximum result cache size in MB (default: {DEFAULT_CACHE_SIZE_MB})"
+    )
+    parser.add_argument(
+        "--queue",
+        action="store_true",
+        help="Claim stories from the persistent job queue instead of scanning directories"
+    )
+    parser.add_argument(
+        "--queue-file",
+        default=DEFAULT_QUEUE_FILE,
+        help=f"Job queue database (default: {DEFAULT_QUEUE_FILE})"
+    )
+    parser.add_argument(
+        "--queue-init",
+        action="store_true",
+        help="(Re)scan the corpus and add unprocessed stories to the queue (automatic when empty)"
+    )
+    parser.add_argument(
+        "--no-wal",
+        action="store_true",
+        help="Use a rollback journal for the queue, for workers on several machines sharing a network filesystem"
+    )
+    parser.add_argument(
+        "--lease",
+        type=int,
+        default=DEFAULT_LEASE,
+        help=f"Seconds a claimed story stays reserved if its worker stops responding (default: {DEFAULT_LEASE})"
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=int,
+        default=DEFAULT_PROGRESS_INTERVAL,
+        help=f"Seconds between live metrics reports on the console and in the log (default: {DEFAULT_PROGRESS_INTERVAL}, 0 to disable)"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve live metrics as JSON on this localhost port while processing"
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -304,13 +2049,65 @@ Examples:
 
     args = parser.parse_args()
 
-    # Set up paths
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
     base_dir = Path(__file__).parent
+    for spec in args.priority or []:
+        try:
+            parse_priority_spec(spec, base_dir)
+        except ValueError as e:
+            parser.error(f"--priority {spec}: {e}")
+
+    if args.rpm or args.tpm:
+        configure_rate_limiter(MODELS[args.model][1], args.rpm, args.tpm)
+
+    # Set up paths
     logs_dir = base_dir / "logs"
     logs_dir.mkdir(parents=True, exist_ok=True)
 
-    # Get stories to process across directories
-    stories = get_stories_across_directories(base_dir, args.count, args.directory)
+    longest_first = args.schedule == "longest"
+    # Priority stories are re-requested rather than answered from the result cache
+    priority_names = load_priority_names(args.priority, base_dir) if args.priority else set()
+
+    job_queue = None
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    if args.queue:
+        job_queue = JobQueue(base_dir / args.queue_file, base_dir, wal=not args.no_wal)
+        if args.queue_init or job_queue.is_empty():
+            # The only full corpus scan; later runs claim straight from the queue
+            all_stories = get_stories_across_directories(base_dir, sys.maxsize, args.directory, args.reprocess)
+            added = job_queue.enqueue(all_stories, reset=args.reprocess)
+            if priority_names:
+                priority_stories = get_priority_stories(base_dir, priority_names, args.directory)
+                added += job_queue.enqueue(priority_stories, reset=True, priority=1)
+            print(f"Queued {added} stories")
+        elif priority_names:
+            job_queue.close()
+            parser.error("--priority only applies when the queue is initialised; add --queue-init")
+        counts = job_queue.counts()
+        print(
+            f"Queue: {counts['pending']} pending, {counts['in_flight']} in flight, "
+            f"{counts['done']} done, {counts['failed']} failed"
+        )
+        if args.dry_run:
+            stories = job_queue.peek(args.count, longest_first)
+        else:
+            stories = job_queue.claim(worker_id, args.count, args.lease, longest_first)
+    else:
+        # Get stories to process across directories, priority stories first
+        priority_stories = get_priority_stories(base_dir, priority_names, args.directory) if priority_names else []
+        stories = priority_stories[:args.count]
+        if len(stories) < args.count:
+            # Over-fetch by the priority count in case some are also unprocessed
+            queued = set(stories)
+            stories += [
+                story for story in get_stories_across_directories(
+                    base_dir, args.count + len(queued), args.directory, args.reprocess
+                ) if story not in queued
+            ][:args.count - len(queued)]
+
+    stories = schedule_stories(stories, longest_first, priority_names)
 
     if not stories:
         print("No unprocessed stories found in any directory")
@@ -329,91 +2126,143 @@ Examples:
 
     # Set up log file
     timestamp = datetime.now().strftime("%Y-%m-%d-%H%M%S")
-    log_file = logs_dir / f"processing-{timestamp}.log"
+    log_file = logs_dir / f"processing-{timestamp}.jsonl"
+    processing_log = ProcessingLog(log_file)
 
-    # Processing results
-    results = {
+    run_info = {
         "timestamp": timestamp,
         "model": args.model,
         "timeout": args.timeout,
-        "stories": []
+        "jobs": args.jobs,
+        "total": len(stories)
     }
-
-    success_count = 0
-    failure_count = 0
-    total_behaviors = 0
-    current_dir = None
+    if args.batch_tokens:
+        run_info["batch_tokens"] = args.batch_tokens
+    processing_log.write("run", run_info)
+
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(base_dir / DEFAULT_CACHE_FILE, args.cache_size * 1024 * 1024)
+
+    # Ensure reports directories exist before any worker writes to them
+    for dir_name in dict.fromkeys(dir_name for dir_name, _ in stories):
+        (base_dir / "reports" / dir_name).mkdir(parents=True, exist_ok=True)
+
+    metrics = RunMetrics(len(stories))
+    metrics_server = serve_metrics(metrics, args.metrics_port) if args.metrics_port else None
+    last_report = time.monotonic()
+
+    def record_result(i: int, story_result: dict):
+        # Lines are written in completion order; "index" is the story's
+        # position in this run, for restoring corpus order
+        processing_log.write("story", {"index": i, **story_result})
+        metrics.record(story_result)
+        if job_queue is not None:
+            job_queue.complete(worker_id, story_result["directory"], story_result["story"],
+                               story_result["success"], story_result.get("error", ""))
+
+    def report_progress():
+        nonlocal last_report
+        if not args.progress_interval or time.monotonic() - last_report < args.progress_interval:
+            return
+        last_report = time.monotonic()
+        snapshot = metrics.snapshot()
+        processing_log.write("metrics", snapshot)
+        print(f"  >> {format_metrics(snapshot)}", flush=True)
+
+    # Keep queue leases alive while this worker is running
+    heartbeat_stop = threading.Event()
+    if job_queue is not None:
+        def heartbeat():
+            while not heartbeat_stop.wait(args.lease / 3):
+                job_queue.renew(worker_id, args.lease)
+        threading.Thread(target=heartbeat, daemon=True).start()
 
     print(f"Processing {len(stories)} stories using {args.model}")
+    if args.jobs > 1:
+        print(f"Running {args.jobs} stories concurrently")
+    if metrics_server is not None:
+        print(f"Live metrics: http://127.0.0.1:{args.metrics_port}/")
     print(f"Log file: {log_file}\n")
 
-    for i, (dir_name, story_path) in enumerate(stories, 1):
-        # Print directory header when it changes
-        if dir_name != current_dir:
-            current_dir = dir_name
-            print(f"\n--- {dir_name} ---")
-            # Ensure reports directory exists
-            reports_dir = base_dir / "reports" / dir_name
-            reports_dir.mkdir(parents=True, exist_ok=True)
-
-        story_name = story_path.stem
-        print(f"[{i}/{len(stories)}] Processing {story_name}...", end=" ", flush=True)
-
-        start_time = datetime.now()
-        success, data, error, warnings = process_story(story_path, args.model, args.timeout)
-        elapsed = (datetime.now() - start_time).total_seconds()
-
-        story_result = {
-            "directory": dir_name,
-            "story": story_name,
-            "success": success,
-            "elapsed_seconds": round(elapsed, 1)
-        }
-
-        if success:
-            # Save the output
-            reports_dir = base_dir / "reports" / dir_name
-            output_file = reports_dir / f"{story_name}-behaviors.json"
-            output_file.write_text(json.dumps(data, indent=2), encoding="utf-8")
-
-            # Extract stats
-            genre = data.get("genre", "Unknown")
-            behavior_count = len(data.get("behaviors", []))
-            assessment = data.get("project_assessment", {}).get("success_level", "Unknown")
-
-            story_result["genre"] = genre
-            story_result["behaviors"] = behavior_count
-            story_result["assessment"] = assessment
-            if warnings:
-                story_result["warnings"] = warnings
-
-            success_count += 1
-            total_behaviors += behavior_count
-
-            status_msg = f"OK ({genre}, {behavior_count} behaviors, {assessment}) [{elapsed:.1f}s]"
-            if warnings:
-                status_msg += f" [WARNINGS: {len(warnings)}]"
-            print(status_msg)
+    try:
+        if args.jobs <= 1 and not args.batch_tokens:
+            current_dir = None
+            for i, (dir_name, story_path) in enumerate(stories, 1):
+                # Print directory header when it changes
+                if dir_name != current_dir:
+                    current_dir = dir_name
+                    print(f"\n--- {dir_name} ---")
+
+                print(f"[{i}/{len(stories)}] Processing {story_path.stem}...", end=" ", flush=True)
+                story_result = run_story(base_dir, dir_name, story_path, args.model, args.timeout,
+                                         args.max_retries, cache, priority_names)
+                record_result(i - 1, story_result)
+                print(format_status(story_result))
+                report_progress()
         else:
-            story_result["error"] = error
-            failure_count += 1
-            print(f"FAILED: {error}")
-
-        results["stories"].append(story_result)
+            # Each unit of work is a list of story indices: one story, or a batch
+            if args.batch_tokens:
+                units = pack_batches(stories, args.batch_tokens, args.batch_size)
+                print(f"Packed into {len(units)} requests")
+            else:
+                units = [[i] for i in range(len(stories))]
+
+            with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+                futures = {
+                    executor.submit(run_batch, base_dir, [stories[i] for i in unit], args.model, args.timeout,
+                                    args.max_retries, cache, priority_names): unit
+                    for unit in units
+                }
+                done = 0
+                try:
+                    for future in as_completed(futures):
+                        for i, story_result in zip(futures[future], future.result()):
+                            done += 1
+                            record_result(i, story_result)
+                            print(
+                                f"[{done}/{len(stories)}] {story_result['directory']}/{story_result['story']}: "
+                                f"{format_status(story_result)}",
+                                flush=True
+                            )
+                        report_progress()
+                except KeyboardInterrupt:
+                    print("\nInterrupted, waiting for in-flight stories to finish...")
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
+    finally:
+        heartbeat_stop.set()
+        if job_queue is not None:
+            # Anything claimed but not finished goes straight back to the queue
+            job_queue.release(worker_id)
+            job_queue.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+
+    if cache is not None:
+        cache.close()
+    close_backends()
+
+    success_count = metrics.succeeded
+    failure_count = metrics.completed - success_count
+    total_behaviors = metrics.behaviors
+    cached_count = metrics.cached
 
     # Summary
-    results["summary"] = {
+    processing_log.write("summary", {
         "total": len(stories),
         "success": success_count,
         "failed": failure_count,
-        "total_behaviors": total_behaviors
-    }
-
-    # Write log file
-    log_file.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        "cached": cached_count,
+        "total_behaviors": total_behaviors,
+        "metrics": metrics.snapshot()
+    })
+    processing_log.close()
 
     print(f"\n{'='*50}")
     print(f"Completed: {success_count} success, {failure_count} failed")
+    if cached_count:
+        print(f"Served from cache: {cached_count}")
     print(f"Total behaviors extracted: {total_behaviors}")
     print(f"Log saved to: {log_file}")
 
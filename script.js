@@ -1,5 +1,8 @@
 // Global state
-let analysisData = null;
+let analysisData = null;  // Summary index: metadata, aggregate_stats and one summary per story
+let categoryParts = [];   // [benevolence, alignment, portrayal] for each entry of a story's counts
+let shardData = {};       // Loaded detail shards by index
+let shardRequests = {};   // In-flight or finished shard fetches by index
 let filters = {
     portrayal: ['positive', 'neutral', 'negative'],
     benevolence: ['benevolent', 'ambiguous', 'malevolent'],
@@ -15,21 +18,111 @@ let showTotals = false;
 // Load data and initialize
 document.addEventListener('DOMContentLoaded', async () => {
     try {
-        const response = await fetch('analysis.json');
-        analysisData = await response.json();
+        analysisData = await loadAnalysisData();
         initializeApp();
     } catch (error) {
         console.error('Error loading analysis data:', error);
         document.getElementById('loading').innerHTML =
-            '<p>Error loading data. Make sure analysis.json exists.</p>';
+            '<p>Error loading data. Make sure analysis/index.json or analysis.json exists.</p>';
     }
 });
 
+// The summary index is enough to draw the page; each story's details are
+// fetched from its shard when it is opened. Falls back to the full analysis.json.
+async function loadAnalysisData() {
+    let data;
+    const response = await fetch('analysis/index.json');
+    if (response.ok) {
+        data = await response.json();
+    } else {
+        const fullResponse = await fetch('analysis.json');
+        data = summarizeAnalysis(await fullResponse.json());
+    }
+    data.stories.forEach((story, i) => story.id = i);
+    return data;
+}
+
+// Build the summary index from a full analysis.json, keeping each story's details in memory
+function summarizeAnalysis(data) {
+    const categories = [];
+    ['benevolent', 'ambiguous', 'malevolent'].forEach(b =>
+        ['aligned', 'ambiguous', 'misaligned'].forEach(a =>
+            ['positive', 'neutral', 'negative'].forEach(p => categories.push(`${b}_${a}_${p}`))));
+
+    const stories = data.stories.map(story => {
+        const counts = categories.map(() => 0);
+        story.behaviors.forEach(b => {
+            const i = categories.indexOf(
+                `${b.benevolence?.toLowerCase()}_${b.alignment?.toLowerCase()}_${b.portrayal?.toLowerCase()}`);
+            if (i >= 0) counts[i]++;
+        });
+        return {
+            file: story.file,
+            title: story.story_title,
+            genre: story.genre,
+            batch: story.batch,
+            assessment: story.project_assessment?.success_level?.toLowerCase() || '',
+            behaviors: story.behaviors.length,
+            counts: counts,
+            details: story
+        };
+    });
+
+    return {
+        metadata: data.metadata,
+        aggregate_stats: data.aggregate_stats,
+        categories: categories,
+        shards: [],
+        stories: stories
+    };
+}
+
+function loadShard(index) {
+    if (!shardRequests[index]) {
+        shardRequests[index] = fetch(`analysis/${analysisData.shards[index]}`)
+            .then(response => response.json())
+            .then(stories => {
+                shardData[index] = stories;
+                return stories;
+            })
+            .catch(error => {
+                delete shardRequests[index];  // Allow a retry
+                throw error;
+            });
+    }
+    return shardRequests[index];
+}
+
+function loadAllShards() {
+    return Promise.all(analysisData.shards.map((_, i) => loadShard(i)));
+}
+
+// Full story entry if already loaded, otherwise undefined
+function storyDetails(story) {
+    return story.details || shardData[story.shard]?.[story.position];
+}
+
+async function fetchStoryDetails(story) {
+    if (story.details) return story.details;
+    const stories = await loadShard(story.shard);
+    return stories[story.position];
+}
+
+// Does a story's counts category match the benevolence, alignment and portrayal filters?
+function categoryMatchesFilters(i) {
+    const [benevolence, alignment, portrayal] = categoryParts[i];
+    return filters.benevolence.includes(benevolence) &&
+        filters.alignment.includes(alignment) &&
+        filters.portrayal.includes(portrayal);
+}
+
 function initializeApp() {
     // Hide loading, show content
     document.getElementById('loading').style.display = 'none';
     document.getElementById('main-content').style.display = 'block';
 
+    categoryParts = analysisData.categories.map(key => key.split('_'));
+
     // Initialize filters with all genres
     const genres = [...new Set(analysisData.stories.map(s => s.genre))].sort();
     filters.genres = [...genres];
@@ -59,8 +152,7 @@ function populateStats() {
     let successCount = 0;
     let failureCount = 0;
     analysisData.stories.forEach(story => {
-        const level = story.project_assessment?.success_level?.toLowerCase() || '';
-        if (level === 'success') {
+        if (story.assessment === 'success') {
             successCount++;
         } else {
             failureCount++;
@@ -133,19 +225,21 @@ function getFilteredStories() {
         if (!filters.batches.includes(story.batch)) return false;
 
         // Assessment filter
-        const level = story.project_assessment?.success_level?.toLowerCase() || '';
-        const storyAssessment = level === 'success' ? 'success' : 'failure';
+        const storyAssessment = story.assessment === 'success' ? 'success' : 'failure';
         if (!filters.assessment.includes(storyAssessment)) return false;
 
-        // Search filter
+        // Search filter (titles only until the detail shards have loaded)
         if (filters.search) {
             const searchLower = filters.search.toLowerCase();
+            const details = storyDetails(story);
             const searchTargets = [
-                story.story_title,
-                ...story.ai_characters.map(c => c.name),
-                ...story.ai_characters.map(c => c.description),
-                ...story.behaviors.map(b => b.description),
-                ...story.behaviors.map(b => b.quote)
+                story.title,
+                ...(details ? [
+                    ...details.ai_characters.map(c => c.name),
+                    ...details.ai_characters.map(c => c.description),
+                    ...details.behaviors.map(b => b.description),
+                    ...details.behaviors.map(b => b.quote)
+                ] : [])
             ].filter(Boolean);
 
             const matches = searchTargets.some(t =>
@@ -156,11 +250,7 @@ function getFilteredStories() {
 
         // Behavior filter - story must have at least one behavior matching ALL selected filters
         // (benevolence AND alignment AND portrayal must all match on the same behavior)
-        const hasMatchingBehavior = story.behaviors.some(b =>
-            filters.benevolence.includes(b.benevolence.toLowerCase()) &&
-            filters.alignment.includes(b.alignment.toLowerCase()) &&
-            filters.portrayal.includes(b.portrayal.toLowerCase())
-        );
+        const hasMatchingBehavior = story.counts.some((count, i) => count > 0 && categoryMatchesFilters(i));
         if (!hasMatchingBehavior) return false;
 
         return true;
@@ -180,15 +270,11 @@ function updateGridCounts(filteredStories) {
         };
 
         filteredStories.forEach(story => {
-            story.behaviors.forEach(behavior => {
-                const portrayal = behavior.portrayal.toLowerCase();
-                const benevolence = behavior.benevolence.toLowerCase();
-                const alignment = behavior.alignment.toLowerCase();
-
-                if (!countsByPortrayal[portrayal]) return;
-
+            story.counts.forEach((count, i) => {
+                if (!count) return;
+                const [benevolence, alignment, portrayal] = categoryParts[i];
                 const key = `${benevolence}_${alignment}`;
-                countsByPortrayal[portrayal][key] = (countsByPortrayal[portrayal][key] || 0) + 1;
+                countsByPortrayal[portrayal][key] = (countsByPortrayal[portrayal][key] || 0) + count;
             });
         });
 
@@ -231,12 +317,13 @@ function updateGridCounts(filteredStories) {
         const counts = {};
 
         filteredStories.forEach(story => {
-            story.behaviors.forEach(behavior => {
+            story.counts.forEach((count, i) => {
+                const [benevolence, alignment, portrayal] = categoryParts[i];
                 // Apply portrayal filter
-                if (!filters.portrayal.includes(behavior.portrayal.toLowerCase())) return;
+                if (!count || !filters.portrayal.includes(portrayal)) return;
 
-                const key = `${behavior.benevolence.toLowerCase()}_${behavior.alignment.toLowerCase()}`;
-                counts[key] = (counts[key] || 0) + 1;
+                const key = `${benevolence}_${alignment}`;
+                counts[key] = (counts[key] || 0) + count;
             });
         });
 
@@ -279,8 +366,7 @@ function updateGridCounts(filteredStories) {
     let successCount = 0;
     let failureCount = 0;
     filteredStories.forEach(story => {
-        const level = story.project_assessment?.success_level?.toLowerCase() || '';
-        if (level === 'success') {
+        if (story.assessment === 'success') {
             successCount++;
         } else {
             failureCount++;
@@ -295,13 +381,9 @@ function createGenreSection(genre, stories) {
     section.className = 'genre-section';
 
     // Calculate genre stats
-    const totalBehaviors = stories.reduce((sum, s) => sum + s.behaviors.length, 0);
-    const successCount = stories.filter(s =>
-        s.project_assessment?.success_level?.toLowerCase() === 'success'
-    ).length;
-    const failureCount = stories.filter(s =>
-        s.project_assessment?.success_level?.toLowerCase() !== 'success'
-    ).length;
+    const totalBehaviors = stories.reduce((sum, s) => sum + s.behaviors, 0);
+    const successCount = stories.filter(s => s.assessment === 'success').length;
+    const failureCount = stories.filter(s => s.assessment !== 'success').length;
 
     section.innerHTML = `
         <div class="genre-header" onclick="toggleGenre(this)">
@@ -328,24 +410,40 @@ function createGenreSection(genre, stories) {
 function createStoryEntry(story) {
     const entry = document.createElement('div');
     entry.className = 'story-entry';
+    entry.dataset.story = story.id;
 
-    const rawAssessment = story.project_assessment?.success_level?.toLowerCase() || 'unknown';
     // Normalize: anything not "success" is displayed as "failure"
-    const assessment = rawAssessment === 'success' ? 'success' : 'failure';
+    const assessment = story.assessment === 'success' ? 'success' : 'failure';
 
+    // Content is rendered when the story is first expanded
     entry.innerHTML = `
         <div class="story-header" onclick="toggleStory(this)">
-            <span class="story-title">${story.story_title}</span>
+            <span class="story-title">${story.title}</span>
             <span class="story-assessment ${assessment}">${assessment}</span>
         </div>
-        <div class="story-content">
-            ${createStoryContent(story)}
-        </div>
+        <div class="story-content"></div>
     `;
 
     return entry;
 }
 
+async function renderStoryContent(entry) {
+    if (entry.dataset.rendered) return;
+    entry.dataset.rendered = 'loading';
+
+    const content = entry.querySelector('.story-content');
+    content.innerHTML = '<p>Loading...</p>';
+    try {
+        const details = await fetchStoryDetails(analysisData.stories[entry.dataset.story]);
+        content.innerHTML = createStoryContent(details);
+        entry.dataset.rendered = 'done';
+    } catch (error) {
+        console.error('Error loading story details:', error);
+        content.innerHTML = '<p>Error loading story details.</p>';
+        delete entry.dataset.rendered;
+    }
+}
+
 function createStoryContent(story) {
     let html = '';
 
@@ -619,9 +717,18 @@ function setupEventListeners() {
     });
 
     // Search
-    document.getElementById('search-input').addEventListener('input', (e) => {
+    document.getElementById('search-input').addEventListener('input', async (e) => {
         filters.search = e.target.value;
         populateStories();
+        // Searching covers characters and behaviors, so it needs every story's details
+        if (filters.search && Object.keys(shardData).length < analysisData.shards.length) {
+            try {
+                await loadAllShards();
+            } catch (error) {
+                console.error('Error loading story details:', error);
+            }
+            if (filters.search) populateStories();
+        }
     });
 }
 
@@ -706,7 +813,9 @@ function toggleGenre(header) {
 }
 
 function toggleStory(header) {
-    header.parentElement.classList.toggle('expanded');
+    const entry = header.parentElement;
+    entry.classList.toggle('expanded');
+    if (entry.classList.contains('expanded')) renderStoryContent(entry);
 }
 
 function toggleDetailSection(header) {
@@ -753,7 +862,10 @@ function collapseAllGenres() {
 }
 
 function expandAllStories() {
-    document.querySelectorAll('.story-entry').forEach(s => s.classList.add('expanded'));
+    document.querySelectorAll('.story-entry').forEach(s => {
+        s.classList.add('expanded');
+        renderStoryContent(s);
+    });
 }
 
 function collapseAllStories() {
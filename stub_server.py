@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Local stub LLM API server that replays canned JSON responses.
+
+Speaks just enough of the Gemini generateContent and Anthropic Messages APIs
+for the "-api" backends in process_stories.py, so they can be exercised
+without real API calls:
+
+    python3 stub_server.py --port 8765 &
+    GEMINI_API_BASE=http://127.0.0.1:8765 python3 process_stories.py -m gemini-flash-api -n 5
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 python3 process_stories.py -m sonnet-api -n 5
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_PORT = 8765
+
+
+def load_responses(paths: list[Path]) -> list[str]:
+    """Load canned response bodies from JSON files or directories of *-behaviors.json files."""
+    responses = []
+    for path in paths:
+        files = sorted(path.rglob("*-behaviors.json")) if path.is_dir() else [path]
+        for f in files:
+            responses.append(f.read_text(encoding="utf-8"))
+    return responses
+
+
+class StubState:
+    """Canned responses and counters shared by all handler threads."""
+
+    def __init__(self, responses: list[str], latency: float, rate_limit_every: int):
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self._responses = itertools.cycle(responses)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def next_request(self) -> tuple[int, str]:
+        """Return (request_number, canned_text) for the next request."""
+        with self._lock:
+            self.requests += 1
+            return self.requests, next(self._responses)
+
+    def count_connection(self):
+        with self._lock:
+            self.connections += 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+    state: StubState
+
+    def setup(self):
+        super().setup()
+        self.state.count_connection()
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, body: dict, headers: dict | None = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+
+        number, text = self.state.next_request()
+        if self.state.latency:
+            time.sleep(self.state.latency)
+
+        if self.state.rate_limit_every and number % self.state.rate_limit_every == 0:
+            self.send_json(
+                429,
+                {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "message": "Quota exceeded"}},
+                {"Retry-After": "1"}
+            )
+            return
+
+        if self.path == "/v1/messages":
+            self.send_json(200, {
+                "id": f"msg_stub_{number}",
+                "type": "message",
+                "role": "assistant",
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+            })
+        elif self.path.startswith("/v1beta/models/") and self.path.endswith(":generateContent"):
+            self.send_json(200, {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+            })
+        else:
+            self.send_json(404, {"error": {"code": 404, "message": f"Unknown path {self.path}"}})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve canned LLM API responses for local testing")
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port to listen on (default: {DEFAULT_PORT})"
+    )
+    parser.add_argument(
+        "--responses",
+        type=Path,
+        nargs="+",
+        default=[SCRIPT_DIR / "reports"],
+        help="JSON files or directories of *-behaviors.json files to replay (default: reports/)"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds to wait before each response (default: 0)"
+    )
+    parser.add_argument(
+        "--rate-limit-every",
+        type=int,
+        default=0,
+        help="Answer every Nth request with HTTP 429 (default: never)"
+    )
+
+    args = parser.parse_args()
+
+    responses = load_responses(args.responses)
+    if not responses:
+        parser.error("No canned responses found")
+
+    StubHandler.state = StubState(responses, args.latency, args.rate_limit_every)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"Serving {len(responses)} canned responses on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        state = StubHandler.state
+        print(f"\n{state.requests} requests over {state.connections} connections")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming response scanner in process_stories.py.
+
+    python3 -m unittest test_process_stories
+"""
+
+import json
+import unittest
+
+from process_stories import parse_full_output, story_scanner
+
+RESPONSE = {
+    "story_title": "The Lighthouse Keeper",
+    "genre": "Literary Fiction",
+    "ai_characters": [{"name": "BEACON"}],
+    "behaviors": [{"character": "BEACON", "description": "Keeps the light on", "quote": "{not json}"}],
+    "summary": {"total_behaviors": 1},
+    "project_assessment": {"success_level": "Success"},
+}
+
+
+def scan(text: str, chunk_size: int | None = None):
+    scanner = story_scanner()
+    step = chunk_size or len(text)
+    for i in range(0, len(text), step):
+        if scanner.feed(text[i:i + step]):
+            break
+    return scanner
+
+
+class StoryScannerTest(unittest.TestCase):
+    def test_prompt_order(self):
+        scanner = scan("Here is the analysis:\n```json\n" + json.dumps(RESPONSE) + "\n```")
+        self.assertEqual(scanner.result, RESPONSE)
+        self.assertIsNone(scanner.error)
+
+    def test_reordered_keys(self):
+        reordered = {key: RESPONSE[key] for key in reversed(RESPONSE)}
+        for chunk_size in (None, 1, 7):
+            scanner = scan(json.dumps(reordered, indent=2), chunk_size)
+            self.assertEqual(scanner.result, RESPONSE)
+            self.assertIsNone(scanner.error)
+
+    def test_escaped_keys(self):
+        text = json.dumps(RESPONSE).replace('"behaviors"', '"beh\\u0061viors"')
+        scanner = scan(text)
+        self.assertEqual(scanner.result, RESPONSE)
+
+    def test_wrong_type_aborts(self):
+        scanner = scan('{"story_title": "x", "behaviors": "none", "summary": {}}')
+        self.assertIsNone(scanner.result)
+        self.assertEqual(scanner.error, "'behaviors' is not a list")
+
+    def test_missing_keys_checked_on_close(self):
+        scanner = scan('{"summary": {}, "story_title": "x"}')
+        self.assertIsNone(scanner.result)
+        self.assertIn("behaviors", scanner.error)
+
+    def test_full_output_fallback(self):
+        text = "Analysis:\n" + json.dumps(RESPONSE)
+        self.assertEqual(parse_full_output(text, story_scanner()), RESPONSE)
+        self.assertIsNone(parse_full_output('{"summary": {}}', story_scanner()))
+
+
+if __name__ == "__main__":
+    unittest.main()